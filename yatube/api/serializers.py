@@ -0,0 +1,43 @@
+from django.urls import reverse
+
+
+def file_url(file):
+    return file.url if file else None
+
+
+def serialize_post(post):
+    return {
+        'id': post.id,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': {
+            'username': post.author.username,
+            'photo': file_url(post.author.profile.photo),
+        },
+        'group': {
+            'slug': post.group.slug,
+            'title': post.group.title,
+        } if post.group else None,
+        'image': file_url(post.image),
+        'comments_count': post.comments_count,
+        'url': reverse('posts:post_detail', kwargs={'post_id': post.id}),
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.id,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+        'author': comment.author.username,
+    }
+
+
+def serialize_page(request, page, serializer):
+    return {
+        'results': [serializer(obj) for obj in page],
+        'next': request.build_absolute_uri(
+            f'?{page.next_query}') if page.has_next() else None,
+        'previous': request.build_absolute_uri(
+            f'?{page.previous_query}') if page.has_previous() else None,
+    }
@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import CursorPaginator
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            creator=cls.user, title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост')
+        cls.comment = Comment.objects.create(
+            author=cls.reader, post=cls.post, text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds(self):
+        urls = (
+            reverse('api:index'),
+            reverse('api:group', kwargs={'slug': self.group.slug}),
+            reverse('api:profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                data = response.json()
+                self.assertEqual(data['results'][0]['id'], self.post.id)
+                self.assertEqual(
+                    data['results'][0]['group']['slug'], self.group.slug)
+                self.assertIsNone(data['next'])
+
+    def test_not_modified_without_queries(self):
+        url = reverse('api:index')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+        etag = response['ETag']
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('Исправленный пост', response.content.decode())
+
+    def test_crafted_cursors_fall_back_to_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 1)
+        cursors = (
+            paginator.encode_values([None, 1]),
+            paginator.encode_values(['2020-01-01T00:00:00+00:00', 10 ** 30]),
+        )
+        urls = (
+            reverse('api:index'),
+            reverse('api:post_comments', kwargs={'post_id': self.post.id}),
+        )
+        for url in urls:
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+                    self.assertEqual(len(response.json()['results']), 1)
+
+    def test_post_and_comments(self):
+        response = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.post.id}))
+        self.assertEqual(response.json()['text'], self.post.text)
+        url = reverse('api:post_comments', kwargs={'post_id': self.post.id})
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            author=self.user, post=self.post, text='Ответ')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(
+            [comment['text'] for comment in response.json()['results']],
+            ['Комментарий', 'Ответ']
+        )
+        response = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertIn('detail', response.json())
+
+    def test_follow_feed(self):
+        url = reverse('api:follow')
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.FORBIDDEN)
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertEqual(response.json()['results'], [])
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(
+            response.json()['results'][0]['id'], self.post.id)
@@ -0,0 +1,115 @@
+from functools import wraps
+from http import HTTPStatus
+
+from api.serializers import serialize_comment, serialize_page, serialize_post
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+from posts import cache
+from posts.models import Group, User
+
+
+def api_view(view):
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse(
+                {'detail': 'Не найдено.'}, status=HTTPStatus.NOT_FOUND)
+    return wrapper
+
+
+def conditional_json(request, scopes, produce):
+    """JSON-ответ с ETag от версий областей кеша.
+
+    ETag считается до обращения к базе, поэтому совпавший
+    ``If-None-Match`` получает 304 без запросов и сериализации.
+    Last-Modified не отдаётся: правки, удаления и новые комментарии не
+    сдвигают дату самого свежего объекта страницы.
+    """
+    etag = cache.etag(scopes, request.user.pk, request.get_full_path())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(
+            produce(), json_dumps_params={'ensure_ascii': False})
+    response['ETag'] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def feed_response(request, scopes, load_page):
+    return conditional_json(
+        request, scopes,
+        lambda: serialize_page(request, load_page(), serialize_post),
+    )
+
+
+@api_view
+def index(request):
+    return feed_response(
+        request,
+        (cache.SITE, cache.INDEX),
+        lambda: cache.get_index_page(request),
+    )
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request,
+        (cache.SITE, cache.group_scope(group.id)),
+        lambda: cache.get_group_page(request, group),
+    )
+
+
+@api_view
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request,
+        (cache.SITE, cache.author_scope(author.id)),
+        lambda: cache.get_profile_page(request, author),
+    )
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'Требуется авторизация.'},
+            status=HTTPStatus.FORBIDDEN
+        )
+    return feed_response(
+        request,
+        cache.follow_scopes(request.user.id),
+        lambda: cache.get_follow_page(request, request.user),
+    )
+
+
+@api_view
+def post_detail(request, post_id):
+    def produce():
+        data = cache.get_post_data(post_id)
+        if not data:
+            raise Http404
+        return serialize_post(data['post'])
+    return conditional_json(
+        request, (cache.SITE, cache.post_scope(post_id)), produce)
+
+
+@api_view
+def post_comments(request, post_id):
+    def produce():
+        if not cache.get_post_data(post_id):
+            raise Http404
+        page = cache.get_comments_page(post_id, request.GET.get('cursor'))
+        return {
+            'results': [serialize_comment(comment) for comment in page],
+            'next': page.next_cursor,
+        }
+    return conditional_json(
+        request, (cache.SITE, cache.post_scope(post_id)), produce)
@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import OutboxMessage
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'recipients', 'status', 'attempts', 'next_attempt', 'sent')
+    list_filter = ('status',)
+    exclude = ('message',)
+    readonly_fields = ('last_error',)
+
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,6 @@
+from core.db import HealthCheckMixin
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(HealthCheckMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,123 @@
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class TwoLevelCache(BaseCache):
+    """Кеш процесса (L1) перед общим кешем (L2).
+
+    Запись идёт в оба уровня, чтение — сначала из L1. Записи L1 живут не
+    дольше ``LOCAL_TIMEOUT`` секунд. Ключи с префиксами из
+    ``LOCAL_EXCLUDE_PREFIXES`` всегда читаются из общего кеша: так
+    хранятся значения, которые должны сразу меняться во всех процессах.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options['SHARED']
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self.exclude_prefixes = tuple(
+            options.get('LOCAL_EXCLUDE_PREFIXES', ()))
+        self.local = LocMemCache(f'two-level-{location}', {
+            'TIMEOUT': self.local_timeout,
+            'OPTIONS': {
+                'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000),
+            },
+        })
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return not key.startswith(self.exclude_prefixes)
+
+    def local_timeout_for(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added and self.is_local(key):
+            self.local.set(
+                key, value, self.local_timeout_for(timeout), version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        if self.is_local(key):
+            value = self.local.get(key, self, version)
+            if value is not self:
+                return value
+        value = self.shared.get(key, self, version)
+        if value is self:
+            return default
+        if self.is_local(key):
+            self.local.set(key, value, self.local_timeout, version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        if self.is_local(key):
+            self.local.set(
+                key, value, self.local_timeout_for(timeout), version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(key, version)
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version)
+        return self.shared.delete(key, version)
+
+    def get_many(self, keys, version=None):
+        local_keys = [key for key in keys if self.is_local(key)]
+        found = self.local.get_many(local_keys, version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self.shared.get_many(missing, version)
+            self.local.set_many(
+                {key: value for key, value in shared.items()
+                 if self.is_local(key)},
+                self.local_timeout,
+                version,
+            )
+            found.update(shared)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        self.local.set_many(
+            {key: value for key, value in data.items()
+             if self.is_local(key) and key not in failed},
+            self.local_timeout_for(timeout),
+            version,
+        )
+        return failed
+
+    def delete_many(self, keys, version=None):
+        self.local.delete_many(keys, version)
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return (
+            self.is_local(key) and self.local.has_key(key, version)
+            or self.shared.has_key(key, version)
+        )
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version)
+        if self.is_local(key):
+            self.local.set(key, value, self.local_timeout, version)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
@@ -0,0 +1,46 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from yatube.settings import SQLITE_PRAGMAS
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """PRAGMA из SQLITE_PRAGMAS для каждого нового соединения SQLite.
+
+    Выполняются через курсор драйвера, чтобы не попадать в счётчики
+    запросов.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    cursor = connection.connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+class HealthCheckMixin:
+    """Проверка постоянного соединения, как CONN_HEALTH_CHECKS в Django 4.1.
+
+    Переиспользуемое соединение проверяется один раз за HTTP-запрос и только
+    перед первым обращением к базе; новое соединение не проверяется.
+    """
+    health_check_done = False
+
+    def connect(self):
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        if (self.connection is not None and not self.health_check_done
+                and not self.in_atomic_block):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
@@ -0,0 +1,155 @@
+"""Уменьшенные копии загруженных картинок.
+
+EXIF с координатами и моделью камеры убирается из оригинала сразу при
+сохранении модели, до записи файла в хранилище (``strip_exif``).
+
+Копии нескольких ширин в JPEG (PNG для картинок с прозрачностью) и WebP
+строятся в пуле потоков после коммита транзакции и сохраняются рядом с
+оригиналом в ``derivatives/``. Список готовых ширин лежит в JSON-манифесте
+и кешируется, поэтому шаблон узнаёт о копиях без обращения к диску.
+"""
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from yatube.settings import IMAGE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'derivatives'
+MANIFEST_TIMEOUT = 60 * 60 * 24
+MISSING_TIMEOUT = 60
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=IMAGE_WORKERS, thread_name_prefix='images')
+    return _executor
+
+
+def derivative_name(name, width, extension):
+    root, _ = os.path.splitext(name)
+    return f'{DERIVATIVES_DIR}/{root}_{width}w.{extension}'
+
+
+def manifest_name(name):
+    return f'{DERIVATIVES_DIR}/{name}.json'
+
+
+def manifest_key(name):
+    return f'images:{name}'
+
+
+def save(name, content):
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(content))
+
+
+def encode(image, image_format, **options):
+    """Картинка в image_format без EXIF: Pillow дописывает в PNG чанк
+    eXIf из image.info, если не передать пустой exif."""
+    buffer = BytesIO()
+    image.save(buffer, image_format, exif=b'', **options)
+    return buffer.getvalue()
+
+
+def strip_exif(image):
+    """Заменяет содержимое ещё не сохранённого файла картинки копией без
+    EXIF, повёрнутой так, как требовал EXIF."""
+    try:
+        image.seek(0)
+        loaded = Image.open(image)
+        loaded.load()
+    except (OSError, SyntaxError):
+        return
+    finally:
+        image.seek(0)
+    if not loaded.info.get('exif') or loaded.format not in (
+            'JPEG', 'PNG', 'WEBP'):
+        return
+    image_format = loaded.format
+    image.file = ContentFile(
+        encode(ImageOps.exif_transpose(loaded), image_format, quality=95),
+        name=image.name,
+    )
+
+
+def process(name, widths):
+    """Строит копии картинки name."""
+    with default_storage.open(name) as original:
+        image = Image.open(original)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    transparent = image.mode in ('RGBA', 'LA', 'P')
+    image = image.convert('RGBA' if transparent else 'RGB')
+    fallback_format, fallback_extension = (
+        ('PNG', 'png') if transparent else ('JPEG', 'jpg'))
+    manifest = {'fallback': fallback_extension, 'widths': []}
+    for width in sorted(widths):
+        width = min(width, image.width)
+        resized = image.copy()
+        resized.thumbnail((width, image.height))
+        save(
+            derivative_name(name, width, fallback_extension),
+            encode(resized, fallback_format, quality=85, optimize=True),
+        )
+        save(
+            derivative_name(name, width, 'webp'),
+            encode(resized, 'WEBP', quality=80, method=4),
+        )
+        manifest['widths'].append(width)
+        if width == image.width:
+            break
+    save(manifest_name(name), json.dumps(manifest).encode())
+    cache.set(manifest_key(name), manifest, MANIFEST_TIMEOUT)
+    return manifest
+
+
+def process_safely(name, widths):
+    try:
+        return process(name, widths)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+
+
+def schedule(name, widths, on_done=None):
+    """Обработать картинку в фоне после коммита текущей транзакции.
+
+    on_done вызывается в том же фоновом потоке после удачной обработки.
+    """
+    def run():
+        if process_safely(name, widths) is not None and on_done:
+            try:
+                on_done()
+            finally:
+                connections.close_all()
+
+    transaction.on_commit(lambda: get_executor().submit(run))
+
+
+def get_manifest(name):
+    """Готовые копии картинки или None, пока их нет."""
+    manifest = cache.get(manifest_key(name))
+    if manifest is not None:
+        return manifest or None
+    try:
+        with default_storage.open(manifest_name(name)) as stored:
+            manifest = json.load(stored)
+    except (OSError, ValueError):
+        cache.set(manifest_key(name), {}, MISSING_TIMEOUT)
+        return None
+    cache.set(manifest_key(name), manifest, MANIFEST_TIMEOUT)
+    return manifest
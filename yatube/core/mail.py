@@ -0,0 +1,103 @@
+"""Отложенная отправка почты через таблицу исходящих писем.
+
+``OutboxBackend`` только сохраняет письма, поэтому запрос не ждёт SMTP.
+Воркер ``send_outbox`` забирает их пачками и отправляет по одному
+SMTP-соединению; неудачные попытки повторяются с растущей паузой.
+"""
+import logging
+import smtplib
+
+from core.models import OutboxMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+from django.db import transaction
+from django.utils import timezone
+
+from yatube.settings import (OUTBOX_LEASE, OUTBOX_MAX_ATTEMPTS,
+                             OUTBOX_RETRY_DELAY)
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        outbox = [
+            OutboxMessage(
+                from_email=message.from_email,
+                recipients='\n'.join(message.recipients()),
+                message=message.message().as_bytes(linesep='\r\n'),
+            )
+            for message in email_messages if message.recipients()
+        ]
+        OutboxMessage.objects.bulk_create(outbox)
+        return len(outbox)
+
+
+def claim(batch_size):
+    """Забирает письма, которым пора уйти, и продлевает им срок на
+    OUTBOX_LEASE, чтобы параллельный воркер их не взял."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+                status=OutboxMessage.PENDING, next_attempt__lte=now,
+            ).order_by('next_attempt').values_list('pk', flat=True)[
+                :batch_size]
+        )
+        OutboxMessage.objects.filter(pk__in=ids).update(
+            next_attempt=now + OUTBOX_LEASE)
+    return list(OutboxMessage.objects.filter(pk__in=ids).order_by('pk'))
+
+
+def retry_later(message, error):
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboxMessage.FAILED
+        logger.error('Письмо %s не отправлено: %s', message.pk, error)
+    else:
+        message.next_attempt = timezone.now() + (
+            OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1))
+    message.save(update_fields=(
+        'attempts', 'last_error', 'status', 'next_attempt'))
+
+
+def deliver(batch_size):
+    """Отправляет одну пачку; возвращает число отправленных и отложенных."""
+    messages = claim(batch_size)
+    if not messages:
+        return 0, 0
+    backend = SMTPBackend(fail_silently=False)
+    try:
+        backend.open()
+    except (OSError, smtplib.SMTPException) as error:
+        for message in messages:
+            retry_later(message, error)
+        return 0, len(messages)
+    sent = []
+    try:
+        for message in messages:
+            try:
+                backend.connection.sendmail(
+                    message.from_email,
+                    message.recipients.splitlines(),
+                    bytes(message.message),
+                )
+            except OSError as error:
+                retry_later(message, error)
+                # SMTPException тоже OSError, но отказ по одному письму
+                # соединение не рвёт.
+                if (isinstance(error, smtplib.SMTPServerDisconnected)
+                        or not isinstance(error, smtplib.SMTPException)):
+                    backend.close()
+                    backend.open()
+            else:
+                sent.append(message.pk)
+    except (OSError, smtplib.SMTPException) as error:
+        # Остаток пачки вернётся в очередь, когда истечёт OUTBOX_LEASE.
+        logger.warning('Не удалось переподключиться к SMTP: %s', error)
+    finally:
+        backend.close()
+        OutboxMessage.objects.filter(pk__in=sent).update(
+            status=OutboxMessage.SENT, sent=timezone.now(), last_error='')
+    return len(sent), len(messages) - len(sent)
@@ -0,0 +1,86 @@
+"""Простой SMTP-сервер для тестов и локальной разработки.
+
+Принимает письма без авторизации и складывает их в ``messages``.
+``reject`` задаёт ответ на RCPT TO, чтобы проверить повторные попытки;
+``rejected`` — то же для отдельных адресов.
+"""
+import socketserver
+import threading
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost ESMTP')
+        envelope = {'from': None, 'to': []}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                envelope = {'from': command[10:].strip('<>'), 'to': []}
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipient = command[8:].strip('<>')
+                reject = self.server.reject or self.server.rejected.get(
+                    recipient)
+                if reject:
+                    self.reply(reject)
+                else:
+                    envelope['to'].append(recipient)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for data_line in self.rfile:
+                    if data_line in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(data_line)
+                self.server.received(envelope, b''.join(data))
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, on_message=None):
+        super().__init__((host, port), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.reject = None
+        self.rejected = {}
+        self.on_message = on_message
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def received(self, envelope, data):
+        message = {'from': envelope['from'], 'to': envelope['to'],
+                   'data': data}
+        with self.lock:
+            self.messages.append(message)
+        if self.on_message:
+            self.on_message(message)
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,34 @@
+import time
+
+from core.mail import deliver
+from django.core.management.base import BaseCommand
+
+from yatube.settings import OUTBOX_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди исходящих пачками по одному '
+            'SMTP-соединению. С --loop работает как постоянный воркер.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='не завершаться, а опрашивать очередь'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='пауза между опросами пустой очереди, секунды'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, deferred = deliver(options['batch_size'])
+            if sent or deferred:
+                self.stdout.write(
+                    f'Отправлено: {sent}, отложено: {deferred}')
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
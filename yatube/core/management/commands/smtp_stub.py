@@ -0,0 +1,23 @@
+from core.mailserver import LocalSMTPServer
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Запускает локальный SMTP-сервер, который печатает полученные '
+            'письма, — замена настоящей почте при разработке.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=1025)
+
+    def handle(self, *args, **options):
+        server = LocalSMTPServer(
+            port=options['port'], on_message=self.show)
+        self.stdout.write(f'SMTP-сервер слушает 127.0.0.1:{server.port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+
+    def show(self, message):
+        self.stdout.write(f"{message['from']} -> {', '.join(message['to'])}")
+        self.stdout.write(message['data'].decode(errors='replace'))
@@ -0,0 +1,19 @@
+import time
+
+from core.warmup import warm_templates
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны и сообщает о синтаксических ошибках. '
+            'Подходит для проверки шаблонов перед выкладкой.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        compiled, errors = warm_templates()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            f'Скомпилировано шаблонов: {compiled} за {elapsed:.1f} мс')
+        if errors:
+            raise CommandError('\n'.join(
+                f'{name}: {error}' for name, error in errors.items()))
@@ -0,0 +1,167 @@
+"""Метрики запросов: время, SQL, попадания в кеш.
+
+Счётчики текущего запроса живут в contextvar, накопленные значения —
+в реестре процесса, который отдаётся в формате Prometheus. У каждого
+воркера свой реестр, суммирует их сборщик метрик.
+"""
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+
+from yatube.settings import BASE_DIR, SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+current = ContextVar('request_metrics', default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def query_origin():
+    """Ближайшие к месту вызова кадры стека из кода проекта."""
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(BASE_DIR)
+        and os.sep + 'site-packages' + os.sep not in frame.filename
+        and not frame.filename.endswith(os.path.join('core', 'metrics.py'))
+    ]
+    return ''.join(traceback.format_list(frames[-3:]))
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.db_time = 0.0
+        self.queries = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for count in self.queries.values())
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            with self.lock:
+                self.db_time += duration
+                self.queries[(sql, repr(params))] += 1
+            if duration * 1000 >= SLOW_QUERY_MS:
+                logger.warning(
+                    'Медленный запрос (%.1f мс): %s\n%s',
+                    duration * 1000, sql, query_origin()
+                )
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка execute_wrapper для всех соединений процесса.
+
+    Пишет в метрики текущего запроса. Потоки sync_to_async получают копию
+    контекста, поэтому запросы из пула async-страниц тоже учитываются.
+    """
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def instrument(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_cache(hit):
+    metrics = current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = Counter()
+        self.durations = defaultdict(float)
+        self.buckets = defaultdict(Counter)
+        self.db_time = defaultdict(float)
+        self.queries = Counter()
+        self.duplicates = Counter()
+        self.cache_hits = Counter()
+        self.cache_misses = Counter()
+
+    def observe(self, view, metrics, duration):
+        with self.lock:
+            self.requests[view] += 1
+            self.durations[view] += duration
+            for bucket in DURATION_BUCKETS:
+                if duration <= bucket:
+                    self.buckets[view][bucket] += 1
+            self.db_time[view] += metrics.db_time
+            self.queries[view] += metrics.query_count
+            self.duplicates[view] += metrics.duplicate_count
+            self.cache_hits[view] += metrics.cache_hits
+            self.cache_misses[view] += metrics.cache_misses
+
+    def render(self):
+        """Текст в формате Prometheus exposition 0.0.4."""
+        with self.lock:
+            lines = []
+            counters = (
+                ('yatube_requests_total', 'Обработанные запросы',
+                 self.requests),
+                ('yatube_db_duration_seconds_total', 'Время в базе данных',
+                 self.db_time),
+                ('yatube_db_queries_total', 'SQL-запросы', self.queries),
+                ('yatube_db_duplicate_queries_total',
+                 'Повторные SQL-запросы', self.duplicates),
+                ('yatube_cache_hits_total', 'Попадания в кеш',
+                 self.cache_hits),
+                ('yatube_cache_misses_total', 'Промахи кеша',
+                 self.cache_misses),
+            )
+            for name, help_text, values in counters:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for view, value in sorted(values.items()):
+                    lines.append(f'{name}{{view="{view}"}} {value:g}')
+            name = 'yatube_request_duration_seconds'
+            lines.append(f'# HELP {name} Время обработки запроса')
+            lines.append(f'# TYPE {name} histogram')
+            for view in sorted(self.requests):
+                for bucket in DURATION_BUCKETS:
+                    lines.append(
+                        f'{name}_bucket{{view="{view}",le="{bucket:g}"}} '
+                        f'{self.buckets[view][bucket]}'
+                    )
+                lines.append(
+                    f'{name}_bucket{{view="{view}",le="+Inf"}} '
+                    f'{self.requests[view]}'
+                )
+                lines.append(
+                    f'{name}_sum{{view="{view}"}} {self.durations[view]:g}')
+                lines.append(
+                    f'{name}_count{{view="{view}"}} {self.requests[view]}')
+            return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+connection_created.connect(instrument)
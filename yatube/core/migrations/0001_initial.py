@@ -0,0 +1,38 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('from_email', models.CharField(max_length=254, verbose_name='отправитель')),
+                ('recipients', models.TextField(verbose_name='получатели, по одному на строку')),
+                ('message', models.BinaryField(verbose_name='письмо в формате MIME')),
+                ('status', models.CharField(choices=[('pending', 'ожидает отправки'), ('sent', 'отправлено'), ('failed', 'не отправлено')], default='pending', max_length=10, verbose_name='статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='попытки')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='следующая попытка')),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('sent', models.DateTimeField(blank=True, null=True, verbose_name='дата отправки')),
+            ],
+            options={
+                'verbose_name': 'Исходящее письмо',
+                'verbose_name_plural': 'Исходящие письма',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['status', 'next_attempt'], name='outbox_status_next_idx'),
+        ),
+    ]
@@ -1,12 +1,49 @@
 from django.db import models
+from django.utils.timezone import now
 
 
 class CreatedModel(models.Model):
     """Абстрактная модель. Добавляет дату создания."""
     created = models.DateTimeField(
         'Дата создания',
-        auto_now_add=True
+        default=now,
+        editable=False
     )
 
     class Meta:
         abstract = True
+
+
+class OutboxMessage(CreatedModel):
+    """Письмо, ждущее отправки воркером send_outbox."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'ожидает отправки'),
+        (SENT, 'отправлено'),
+        (FAILED, 'не отправлено'),
+    )
+
+    from_email = models.CharField('отправитель', max_length=254)
+    recipients = models.TextField('получатели, по одному на строку')
+    message = models.BinaryField('письмо в формате MIME')
+    status = models.CharField(
+        'статус', max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField('попытки', default=0)
+    next_attempt = models.DateTimeField('следующая попытка', default=now)
+    last_error = models.TextField('последняя ошибка', blank=True)
+    sent = models.DateTimeField('дата отправки', null=True, blank=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'next_attempt'),
+                name='outbox_status_next_idx'
+            ),
+        )
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.recipients.splitlines()[0]} ({self.status})'
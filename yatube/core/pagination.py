@@ -0,0 +1,60 @@
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+from yatube.settings import ADMIN_EXACT_COUNT_LIMIT
+
+
+def estimate_sqlite(cursor, table):
+    cursor.execute(
+        'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+    row = cursor.fetchone()
+    return int(row[0].split()[0]) if row else None
+
+
+def estimate_postgresql(cursor, table):
+    cursor.execute(
+        'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+        [table],
+    )
+    row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+ESTIMATORS = {
+    'sqlite': estimate_sqlite,
+    'postgresql': estimate_postgresql,
+}
+
+
+def estimate_count(model, using='default'):
+    """Число строк таблицы по статистике планировщика: sqlite_stat1 после
+    ANALYZE или pg_class.reltuples. None, если статистики нет."""
+    connection = connections[using]
+    estimator = ESTIMATORS.get(connection.vendor)
+    if estimator is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            return estimator(cursor, model._meta.db_table)
+    except DatabaseError:
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор для changelist'ов больших таблиц.
+
+    Без фильтров число строк берётся из статистики базы, если оно больше
+    ADMIN_EXACT_COUNT_LIMIT. С фильтрами считаются не больше
+    ADMIN_EXACT_COUNT_LIMIT строк: дальше выборку нужно сужать фильтром
+    или иерархией дат, а не листать.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:ADMIN_EXACT_COUNT_LIMIT].count()
@@ -0,0 +1,99 @@
+"""Отдача файлов из STATIC_ROOT и MEDIA_ROOT без фронтенд-сервера.
+
+Ответы — FileResponse поверх открытого файла, поэтому WSGI-сервер с
+``wsgi.file_wrapper`` (gunicorn, uWSGI) отправляет их через sendfile.
+Поддерживается один диапазон в заголовке Range.
+"""
+import mimetypes
+import os
+import re
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Файл, из которого читается только отрезок [start, start + length).
+
+    fileno() остаётся у исходного файла: sendfile начинает с текущей
+    позиции и берёт длину из Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def find_file(root, path):
+    try:
+        fullpath = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    return fullpath
+
+
+def parse_range(header, size):
+    """(start, length) для заголовка Range или None, если его нужно
+    игнорировать и отдать файл целиком."""
+    match = RANGE_RE.match(header or '')
+    if match is None or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        start = max(size - int(end), 0)
+        end = size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        return None
+    return start, end - start + 1
+
+
+def file_response(request, fullpath, content_type=None, cache_control=None):
+    stat = os.stat(fullpath)
+    if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size):
+        return HttpResponseNotModified()
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    file = open(fullpath, 'rb')
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, length = byte_range
+        response = FileResponse(
+            FileRange(file, start, length), content_type=content_type,
+            status=206)
+        response['Content-Length'] = length
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{stat.st_size}')
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    return response
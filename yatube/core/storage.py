@@ -0,0 +1,51 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.txt', '.json', '.xml')
+MIN_SIZE = 256
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и заранее сжатыми копиями.
+
+    После collectstatic рядом с каждым текстовым файлом лежат ``.gz`` и,
+    если установлен пакет brotli, ``.br``. Их отдаёт core.views.static_file
+    или фронтенд (``gzip_static``/``brotli_static`` в nginx).
+    """
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        for name in set(self.hashed_files.values()):
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            for compressed_name in self.compress(name):
+                yield compressed_name, compressed_name, True
+
+    def compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_SIZE:
+            return
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data) * 0.95:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+            yield name + suffix
@@ -0,0 +1,32 @@
+from core.images import derivative_name, get_manifest
+from django import template
+from django.core.files.storage import default_storage
+
+register = template.Library()
+
+
+def build_srcset(name, widths, extension):
+    return ', '.join(
+        f'{default_storage.url(derivative_name(name, width, extension))} '
+        f'{width}w'
+        for width in widths
+    )
+
+
+@register.inclusion_tag('includes/picture.html')
+def picture(image, sizes='100vw', css_class='', alt=''):
+    """<picture> с WebP и srcset из готовых копий картинки; пока копий
+    нет, отдаётся оригинал."""
+    context = {'sizes': sizes, 'css_class': css_class, 'alt': alt}
+    if not image:
+        return context
+    context['src'] = image.url
+    manifest = get_manifest(image.name)
+    if manifest and manifest['widths']:
+        widths = manifest['widths']
+        context['srcset'] = build_srcset(
+            image.name, widths, manifest['fallback'])
+        context['webp_srcset'] = build_srcset(image.name, widths, 'webp')
+        context['src'] = default_storage.url(
+            derivative_name(image.name, widths[-1], manifest['fallback']))
+    return context
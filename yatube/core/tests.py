@@ -1,4 +1,56 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import re
+import tempfile
+import time
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import send_mail
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import Http404, HttpResponse
+from django.template import Context, Template, engines
+from django.test import (AsyncClient, RequestFactory, SimpleTestCase,
+                         TestCase, TransactionTestCase, override_settings)
+from django.urls import path, reverse
+from django.utils import timezone
+from PIL import Image
+from posts import async_views, notifications
+from posts.models import Follow, Post
+
+from yatube.urls import urlpatterns as site_urlpatterns
+
+from . import images, views
+from .db import HealthCheckMixin
+from .mailserver import LocalSMTPServer
+from .metrics import registry
+from .models import OutboxMessage
+from .warmup import template_names
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+async def slow_view(request):
+    await asyncio.sleep(0.2)
+    return HttpResponse()
+
+
+urlpatterns = [
+    path('slow/', slow_view),
+    path('async/profile/<str:username>/', async_views.profile),
+] + site_urlpatterns
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +58,499 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_server_timing(self):
+        response = self.client.get('/')
+        timing = response['Server-Timing']
+        self.assertIn('app;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn('0 duplicates', timing)
+        self.assertIn('0 hits, 1 misses', timing)
+        timing = self.client.get('/')['Server-Timing']
+        self.assertIn('1 hits, 0 misses', timing)
+
+    @mock.patch('core.views.METRICS_TOKEN', 'secret')
+    def test_metrics_endpoint(self):
+        self.client.get('/')
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('yatube_requests_total{view="posts:index"} 1', body)
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            body
+        )
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            with self.subTest(headers=headers):
+                self.assertEqual(
+                    self.client.get(
+                        '/metrics', REMOTE_ADDR='127.0.0.1', **headers
+                    ).status_code,
+                    404
+                )
+        staff = get_user_model().objects.create_user(
+            username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_metrics_closed_without_token(self):
+        self.assertEqual(
+            self.client.get(
+                '/metrics', HTTP_AUTHORIZATION='Bearer ').status_code,
+            404
+        )
+
+    def test_slow_queries_logged_with_origin(self):
+        with mock.patch('core.metrics.SLOW_QUERY_MS', 0):
+            with self.assertLogs('core.metrics', 'WARNING') as logs:
+                self.client.get('/')
+        self.assertIn('get_numbered_page', logs.output[0])
+
+    def test_sampling(self):
+        with mock.patch('core.middleware.METRICS_SAMPLE_RATE', 0):
+            response = self.client.get('/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('posts:index', registry.render())
+
+
+@override_settings(ROOT_URLCONF='core.tests')
+@mock.patch('posts.async_views.ASYNC_PARALLEL_QUERIES', True)
+class AsyncRequestMetricsTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.author = get_user_model().objects.create_user(username='auth')
+        self.reader = get_user_model().objects.create_user(username='reader')
+        Post.objects.create(author=self.author, text='Асинхронный пост')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.addCleanup(notifications.buffer.clear)
+
+    async def test_requests_run_concurrently(self):
+        client = AsyncClient()
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.get('/slow/') for _ in range(4)))
+        self.assertLess(time.perf_counter() - started, 0.6)
+        for response in responses:
+            self.assertIn('app;dur=', response['Server-Timing'])
+
+    async def test_pool_thread_queries_counted(self):
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.reader)
+        response = await client.get('/async/profile/auth/')
+        self.assertContains(response, 'Отписаться')
+        queries = int(re.search(
+            r'(\d+) queries', response['Server-Timing']).group(1))
+        self.assertGreaterEqual(queries, 4)
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'core.cache.TwoLevelCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_TIMEOUT': 60,
+            'LOCAL_EXCLUDE_PREFIXES': ('version:',),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared-stand-in',
+    },
+})
+class TwoLevelCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.shared = caches['shared']
+        self.cache.clear()
+
+    def test_writes_reach_shared_cache(self):
+        self.cache.set('key', 'value')
+        self.cache.set_many({'one': 1, 'two': 2})
+        self.assertEqual(self.shared.get('key'), 'value')
+        self.assertEqual(
+            self.shared.get_many(['one', 'two']), {'one': 1, 'two': 2})
+
+    def test_reads_are_served_locally(self):
+        self.cache.set('key', 'value')
+        self.shared.set('key', 'changed elsewhere')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.cache.delete('key')
+        self.assertIsNone(self.shared.get('key'))
+
+    def test_excluded_prefixes_always_read_shared_cache(self):
+        self.cache.set('version:index', 1)
+        self.shared.incr('version:index')
+        self.assertEqual(self.cache.get('version:index'), 2)
+        self.assertEqual(self.cache.incr('version:index'), 3)
+        self.assertEqual(
+            self.cache.get_many(['version:index']), {'version:index': 3})
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImagesTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = BytesIO()
+        Image.new('RGB', (800, 400), 'red').save(
+            buffer, 'JPEG', exif=exif)
+        self.name = default_storage.save(
+            'posts/photo.jpg',
+            SimpleUploadedFile('photo.jpg', buffer.getvalue())
+        )
+
+    def tearDown(self):
+        default_storage.delete(self.name)
+
+    def test_process_builds_derivatives_without_exif(self):
+        manifest = images.process(self.name, (320, 640, 960))
+        self.assertEqual(manifest['widths'], [320, 640, 800])
+        for width in manifest['widths']:
+            for extension in ('jpg', 'webp'):
+                with self.subTest(width=width, extension=extension):
+                    name = images.derivative_name(self.name, width, extension)
+                    with default_storage.open(name) as derivative:
+                        image = Image.open(derivative)
+                        self.assertEqual(image.width, width)
+                        self.assertNotIn('exif', image.info)
+
+    def test_exif_stripped_on_save(self):
+        with default_storage.open(self.name) as original:
+            content = original.read()
+        author = get_user_model().objects.create_user(username='auth')
+        with mock.patch('core.images.get_executor') as executor:
+            with self.captureOnCommitCallbacks():
+                post = Post.objects.create(
+                    author=author, text='Пост с фото',
+                    image=SimpleUploadedFile('exif.jpg', content),
+                )
+        executor.assert_not_called()
+        with default_storage.open(post.image.name) as stored:
+            image = Image.open(stored)
+            self.assertNotIn('exif', image.info)
+            self.assertEqual(image.size, (800, 400))
+
+    def test_png_exif_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = BytesIO()
+        Image.new('RGBA', (400, 200), 'red').save(buffer, 'PNG', exif=exif)
+        author = get_user_model().objects.create_user(username='auth')
+        with self.captureOnCommitCallbacks():
+            post = Post.objects.create(
+                author=author, text='Пост с PNG',
+                image=SimpleUploadedFile('exif.png', buffer.getvalue()),
+            )
+        with default_storage.open(post.image.name) as stored:
+            self.assertNotIn('exif', Image.open(stored).info)
+        original = default_storage.save(
+            'posts/raw.png', SimpleUploadedFile('raw.png', buffer.getvalue()))
+        manifest = images.process(original, (200,))
+        self.assertEqual(manifest['fallback'], 'png')
+        name = images.derivative_name(original, 200, 'png')
+        with default_storage.open(name) as derivative:
+            self.assertNotIn('exif', Image.open(derivative).info)
+
+    def test_picture_tag_uses_derivatives(self):
+        template = Template('{% load images %}{% picture image %}')
+        image = SimpleNamespace(
+            name=self.name, url=default_storage.url(self.name))
+        self.assertNotIn('srcset', template.render(Context({'image': image})))
+        cache.clear()
+        images.process(self.name, (320,))
+        html = template.render(Context({'image': image}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('photo_320w.webp 320w', html)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.OutboxBackend', EMAIL_HOST='127.0.0.1')
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.server = LocalSMTPServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        settings_override = override_settings(EMAIL_PORT=self.server.port)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def send_outbox(self):
+        call_command('send_outbox', stdout=StringIO())
+
+    def test_password_reset_is_queued(self):
+        get_user_model().objects.create_user(
+            username='auth', email='auth@example.com', password='secret')
+        self.client.post(
+            reverse('users:password_reset'), {'email': 'auth@example.com'})
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.recipients, 'auth@example.com')
+        self.assertEqual(self.server.connections, 0)
+        self.send_outbox()
+        self.assertEqual(self.server.messages[0]['to'], ['auth@example.com'])
+        self.assertIn(b'/auth/reset/', self.server.messages[0]['data'])
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.SENT)
+
+    def test_batch_uses_one_connection(self):
+        for number in range(5):
+            send_mail('Тема', 'Текст', 'from@example.com',
+                      [f'user{number}@example.com'])
+        self.send_outbox()
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(self.server.connections, 1)
+        self.assertFalse(
+            OutboxMessage.objects.exclude(status=OutboxMessage.SENT).exists())
+
+    def test_retry_with_backoff(self):
+        send_mail('Тема', 'Текст', 'from@example.com', ['to@example.com'])
+        self.server.reject = '451 Try again later'
+        self.send_outbox()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(
+            (message.status, message.attempts),
+            (OutboxMessage.PENDING, 1)
+        )
+        self.assertGreater(message.next_attempt, timezone.now())
+        self.assertIn('451', message.last_error)
+        self.server.reject = None
+        OutboxMessage.objects.update(next_attempt=timezone.now())
+        self.send_outbox()
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.SENT)
+
+    def test_rejected_recipient_keeps_connection(self):
+        for recipient in ('first', 'rejected', 'last'):
+            send_mail('Тема', 'Текст', 'from@example.com',
+                      [f'{recipient}@example.com'])
+        self.server.rejected['rejected@example.com'] = '550 No such user'
+        self.send_outbox()
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(
+            [message['to'] for message in self.server.messages],
+            [['first@example.com'], ['last@example.com']]
+        )
+        message = OutboxMessage.objects.get(status=OutboxMessage.PENDING)
+        self.assertEqual(message.recipients, 'rejected@example.com')
+        self.assertEqual(message.attempts, 1)
+        self.assertIn('550', message.last_error)
+
+    def test_gives_up_after_max_attempts(self):
+        send_mail('Тема', 'Текст', 'from@example.com', ['to@example.com'])
+        self.server.reject = '550 No such user'
+        with mock.patch('core.mail.OUTBOX_MAX_ATTEMPTS', 2):
+            self.send_outbox()
+            OutboxMessage.objects.update(next_attempt=timezone.now())
+            with self.assertLogs('core.mail', 'ERROR'):
+                self.send_outbox()
+        self.assertEqual(
+            OutboxMessage.objects.get().status, OutboxMessage.FAILED)
+
+
+class SessionAuthTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='reader', password='secret-pass')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_logged_in_page_without_queries(self):
+        self.client.login(username='reader', password='secret-pass')
+        url = reverse('posts:index')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_anonymous_page_without_session(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_user_change_ends_cached_session(self):
+        self.client.login(username='reader', password='secret-pass')
+        url = reverse('posts:follow_index')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.user.set_password('another-pass')
+        self.user.save()
+        self.assertRedirects(
+            self.client.get(url), f'{reverse("users:login")}?next={url}')
+
+
+class FileServingTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.static_root = os.path.join(cls.root, 'static')
+        with override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'),
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(cls.static_root, 'staticfiles.json')) as f:
+            cls.manifest = json.load(f)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, view, path, **headers):
+        return view(RequestFactory().get(f'/{path}', **headers), path=path)
+
+    def test_collectstatic_compresses_hashed_files(self):
+        name = self.manifest['css/bootstrap.min.css']
+        with open(os.path.join(self.static_root, name), 'rb') as f:
+            original = f.read()
+        with open(os.path.join(self.static_root, name + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), original)
+
+    def test_static_file_headers(self):
+        name = self.manifest['css/bootstrap.min.css']
+        with mock.patch('core.views.STATIC_ROOT', self.static_root):
+            response = self.get(
+                views.static_file, name, HTTP_ACCEPT_ENCODING='gzip, br')
+            plain = self.get(views.static_file, 'css/bootstrap.min.css')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', plain['Cache-Control'])
+        response.close()
+        plain.close()
+
+    def test_media_ranges(self):
+        data = bytes(range(100))
+        with open(os.path.join(self.root, 'clip.bin'), 'wb') as f:
+            f.write(data)
+        ranges = {
+            'bytes=10-19': data[10:20],
+            'bytes=90-': data[90:],
+            'bytes=-5': data[-5:],
+        }
+        with mock.patch('core.views.MEDIA_ROOT', self.root):
+            for header, expected in ranges.items():
+                with self.subTest(header=header):
+                    response = self.get(
+                        views.media_file, 'clip.bin', HTTP_RANGE=header)
+                    self.assertEqual(response.status_code, 206)
+                    self.assertEqual(
+                        int(response['Content-Length']), len(expected))
+                    self.assertEqual(
+                        b''.join(response.streaming_content), expected)
+                    response.close()
+            response = self.get(views.media_file, 'clip.bin')
+            self.assertEqual(b''.join(response.streaming_content), data)
+            response.close()
+            with self.assertRaises(Http404):
+                self.get(views.media_file, '../settings.py')
+
+    def test_media_accel_redirect(self):
+        open(os.path.join(self.root, 'photo.jpg'), 'wb').close()
+        with mock.patch('core.views.MEDIA_ROOT', self.root), mock.patch(
+                'core.views.MEDIA_ACCEL_REDIRECT', '/protected-media/'):
+            response = self.get(views.media_file, 'photo.jpg')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/photo.jpg')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response.content, b'')
+
+
+class WarmTemplatesTest(SimpleTestCase):
+    def cached_templates(self):
+        templates = [dict(
+            settings.TEMPLATES[0],
+            OPTIONS=dict(
+                settings.TEMPLATES[0]['OPTIONS'],
+                loaders=[(
+                    'django.template.loaders.cached.Loader',
+                    settings.TEMPLATE_LOADERS,
+                )],
+            ),
+        )]
+        return override_settings(TEMPLATES=templates)
+
+    def test_all_templates_compiled(self):
+        with self.cached_templates():
+            engine = engines['django'].engine
+            call_command('warm_templates', stdout=StringIO())
+            cached = engine.template_loaders[0].get_template_cache
+            for name in ('base.html', 'posts/includes/feed.html',
+                         'admin/base.html'):
+                with self.subTest(name=name):
+                    self.assertIn(name, cached)
+            self.assertEqual(len(cached), len(template_names(engine)))
+
+    def test_broken_template_reported(self):
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with open(os.path.join(directory, 'broken.html'), 'w') as f:
+            f.write('{% if %}')
+        templates = [dict(
+            settings.TEMPLATES[0],
+            DIRS=settings.TEMPLATES[0]['DIRS'] + [directory],
+        )]
+        with override_settings(TEMPLATES=templates):
+            with self.assertRaisesMessage(CommandError, 'broken.html'):
+                call_command('warm_templates', stdout=StringIO())
+
+
+class DatabaseSetupTest(SimpleTestCase):
+    def test_sqlite_pragmas(self):
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        wrapper = connection.copy()
+        wrapper.settings_dict['NAME'] = os.path.join(directory, 'db.sqlite3')
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+        self.assertEqual(
+            pragmas,
+            {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000},
+        )
+
+    def test_reused_connection_checked_once_per_request(self):
+        class CheckedWrapper(HealthCheckMixin, DatabaseWrapper):
+            pass
+
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        wrapper = CheckedWrapper(
+            dict(connection.settings_dict, CONN_MAX_AGE=60,
+                 NAME=os.path.join(directory, 'db.sqlite3')),
+            alias='checked',
+        )
+        self.addCleanup(wrapper.close)
+        with mock.patch.object(
+                wrapper, 'is_usable', return_value=False) as is_usable:
+            wrapper.cursor().close()
+            wrapper.cursor().close()
+            is_usable.assert_not_called()
+            broken = wrapper.connection
+            wrapper.close_if_unusable_or_obsolete()
+            wrapper.cursor().close()
+            wrapper.cursor().close()
+        is_usable.assert_called_once_with()
+        self.assertIsNot(wrapper.connection, broken)
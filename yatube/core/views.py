@@ -1,4 +1,21 @@
+import hmac
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from core.metrics import registry
+from core.serving import file_response, find_file
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+
+from yatube.settings import (MEDIA_ACCEL_REDIRECT, MEDIA_MAX_AGE, MEDIA_ROOT,
+                             METRICS_TOKEN, STATIC_MAX_AGE, STATIC_ROOT)
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
 
 
 def page_not_found(request, exception):
@@ -15,3 +32,57 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики для персонала или сборщика с токеном METRICS_TOKEN. Адрес
+    клиента не проверяется: за прокси все запросы приходят с локального."""
+    scheme, _, token = request.META.get(
+        'HTTP_AUTHORIZATION', '').partition(' ')
+    authorized = bool(METRICS_TOKEN) and scheme == 'Bearer' and (
+        hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()))
+    if not authorized and not request.user.is_staff:
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4')
+
+
+def static_file(request, path):
+    """Статика из STATIC_ROOT: сжатая копия, если клиент её принимает, и
+    вечное кеширование для имён с хешем."""
+    fullpath = find_file(STATIC_ROOT, path)
+    content_type, _ = mimetypes.guess_type(fullpath)
+    accepted = {
+        part.split(';')[0].strip()
+        for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')
+    }
+    encoding = None
+    for name, suffix in ENCODINGS:
+        if name in accepted and os.path.isfile(fullpath + suffix):
+            fullpath, encoding = fullpath + suffix, name
+            break
+    if HASHED_NAME_RE.search(path):
+        cache_control = IMMUTABLE
+    else:
+        cache_control = f'public, max-age={STATIC_MAX_AGE}'
+    response = file_response(request, fullpath, content_type, cache_control)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def media_file(request, path):
+    """Файлы из MEDIA_ROOT. С MEDIA_ACCEL_REDIRECT файл отдаёт nginx по
+    внутреннему адресу, иначе — FileResponse с поддержкой Range."""
+    fullpath = find_file(MEDIA_ROOT, path)
+    cache_control = f'public, max-age={MEDIA_MAX_AGE}'
+    if not MEDIA_ACCEL_REDIRECT:
+        return file_response(
+            request, fullpath, cache_control=cache_control)
+    content_type, _ = mimetypes.guess_type(fullpath)
+    response = HttpResponse(
+        content_type=content_type or 'application/octet-stream')
+    response['X-Accel-Redirect'] = MEDIA_ACCEL_REDIRECT + quote(path)
+    response['Cache-Control'] = cache_control
+    return response
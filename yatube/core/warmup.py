@@ -0,0 +1,45 @@
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+
+def template_dirs(loaders):
+    for loader in loaders:
+        if hasattr(loader, 'loaders'):
+            yield from template_dirs(loader.loaders)
+        elif hasattr(loader, 'get_dirs'):
+            yield from loader.get_dirs()
+
+
+def template_names(engine):
+    names = set()
+    for directory in template_dirs(engine.template_loaders):
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.startswith('.'):
+                    continue
+                path = os.path.relpath(os.path.join(root, filename), directory)
+                names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_templates():
+    """Компилирует все шаблоны Django-движков.
+
+    С кешируемым загрузчиком первый запрос к странице не тратит время на
+    разбор шаблонов. Возвращает число шаблонов и словарь ошибок по именам.
+    """
+    compiled = 0
+    errors = {}
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError) as error:
+                errors[name] = error
+            else:
+                compiled += 1
+    return compiled, errors
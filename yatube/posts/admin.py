@@ -1,36 +1,63 @@
+from core.pagination import EstimatedCountPaginator
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post, Profile
+from .models import Comment, Follow, Group, Notification, Post, Profile
 from .utils import get_all_fields
 
 
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist без полного COUNT(*): оценка числа строк из статистики
+    базы и без второго подсчёта всей таблицы при фильтрации."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 class GroupAdmin(admin.ModelAdmin):
     list_display = get_all_fields(Group)
+    list_select_related = ('creator',)
+    raw_id_fields = ('creator',)
     search_fields = ('title', 'slug')
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = get_all_fields(Post)
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = get_all_fields(Comment)
+    list_select_related = ('post', 'author')
+    raw_id_fields = ('post', 'author')
+    date_hierarchy = 'created'
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = get_all_fields(Follow)
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+
+
+class NotificationAdmin(LargeTableAdmin):
+    list_display = get_all_fields(Notification)
+    list_select_related = ('recipient', 'post', 'last_actor')
+    raw_id_fields = ('recipient', 'post', 'last_actor')
+    list_filter = ('kind', 'read')
 
 
 class ProfileAdmin(admin.ModelAdmin):
     list_display = get_all_fields(Profile)
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
 
 
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(Notification, NotificationAdmin)
 admin.site.register(Post, PostAdmin)
 admin.site.register(Profile, ProfileAdmin)
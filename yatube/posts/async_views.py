@@ -0,0 +1,98 @@
+"""Асинхронные версии страниц лент для запуска под ASGI.
+
+ORM в Django 3.2 синхронный, поэтому независимые запросы уходят в пул
+потоков через ``sync_to_async`` и ждутся вместе через
+``asyncio.gather``. Маршруты переключает настройка ASYNC_FEED_VIEWS.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
+from posts.cache import (get_comments_page, get_group_page, get_index_page,
+                         get_post_data, get_profile_page)
+from posts.forms import CommentForm
+from posts.models import Follow, Group, User
+
+from yatube.settings import ASYNC_PARALLEL_QUERIES, CHARS_SHOWN
+
+
+def in_thread(function):
+    """Корутина, выполняющая синхронную function в потоке пула.
+
+    У каждого потока своё соединение с базой. Без ASYNC_PARALLEL_QUERIES
+    вызовы идут в общий синхронный поток и видят его транзакцию — это
+    нужно, например, в тестах.
+    """
+    def run(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    async def call(*args, **kwargs):
+        if ASYNC_PARALLEL_QUERIES:
+            return await sync_to_async(run, thread_sensitive=False)(
+                *args, **kwargs)
+        return await sync_to_async(function)(*args, **kwargs)
+    return call
+
+
+def is_following(user, author):
+    return user.is_authenticated and Follow.objects.filter(
+        user=user, author=author).exists()
+
+
+async def index(request):
+    context = {
+        'page_name': 'index',
+        'page_obj': await in_thread(get_index_page)(request),
+    }
+    return await in_thread(render)(request, 'posts/index.html', context)
+
+
+async def group_posts(request, slug):
+    group = await in_thread(get_object_or_404)(Group, slug=slug)
+    context = {
+        'group': group,
+        'page_obj': await in_thread(get_group_page)(request, group),
+    }
+    return await in_thread(render)(request, 'posts/group_list.html', context)
+
+
+async def profile(request, username):
+    author = await in_thread(get_object_or_404)(
+        User.objects.select_related('profile'), username=username)
+    page_obj, following = await asyncio.gather(
+        in_thread(get_profile_page)(request, author),
+        in_thread(is_following)(request.user, author),
+    )
+    context = {
+        'author': author,
+        'posts_num': author.profile.posts_count,
+        'page_obj': page_obj,
+        'followers_num': author.profile.followers_count,
+        'following_num': author.profile.following_count,
+        'following': following,
+    }
+    return await in_thread(render)(request, 'posts/profile.html', context)
+
+
+async def post_detail(request, post_id):
+    data, comments = await asyncio.gather(
+        in_thread(get_post_data)(post_id),
+        in_thread(get_comments_page)(post_id, request.GET.get('comments')),
+    )
+    if not data:
+        raise Http404
+    post = data['post']
+    context = {
+        'post': post,
+        'form': CommentForm(request.POST or None),
+        'comments': comments,
+        'num_comments': post.comments_count,
+        'CHARS_SHOWN': CHARS_SHOWN,
+    }
+    return await in_thread(render)(
+        request, 'posts/post_detail.html', context)
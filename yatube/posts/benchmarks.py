@@ -0,0 +1,440 @@
+"""Наполнение и изолированная база для бенчмарков ленты."""
+import asyncio
+import math
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import Count, Max, Min
+from django.template.backends.django import Template
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import notifications, timeline
+from posts import urls as posts_urls
+from posts.models import Comment, Follow, Group, Post, Profile, User
+from posts.utils import batched
+
+BATCH_SIZE = 5000
+FEED_VIEWS = ('index', 'group_list', 'profile', 'post_detail')
+BENCHMARK_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'benchmark',
+}}
+
+
+@contextmanager
+def benchmark_database(keepdb=False, name=None):
+    """Временная тестовая база, чтобы не трогать рабочие данные.
+
+    name задаёт файл тестовой базы SQLite вместо базы в памяти: так потоки
+    работают с настоящим журналом и блокировками файла. Кеш на время
+    замеров подменяется отдельным LocMem, рабочий кеш не очищается.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings['NAME']
+    if name:
+        test_settings['NAME'] = name
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+    try:
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            yield
+            notifications.flush()
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb)
+        test_settings['NAME'] = old_test_name
+
+
+def seed(users=1000, groups=50, posts=10000, comments=20000, follows=1000,
+         random_seed=0):
+    """Создаёт воспроизводимый набор данных пачками через bulk_create.
+
+    bulk_create не отправляет сигналы, поэтому счётчики и ленты подписок
+    собираются в конце отдельно.
+    """
+    rnd = random.Random(random_seed)
+    now = timezone.now()
+    User.objects.bulk_create(
+        (User(username=f'bench{i}', password='!') for i in range(users)),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(User.objects.filter(
+        username__startswith='bench').values_list('id', flat=True))
+    Profile.objects.bulk_create(
+        (Profile(user_id=user_id) for user_id in user_ids),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    Group.objects.bulk_create(
+        (
+            Group(
+                creator_id=rnd.choice(user_ids),
+                title=f'Группа {i}',
+                slug=f'bench-{i}',
+                description='Группа для бенчмарка',
+            )
+            for i in range(groups)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-').values_list('id', flat=True))
+    new_posts = (
+        Post(
+            author_id=rnd.choice(user_ids),
+            group_id=rnd.choice(group_ids) if rnd.random() < 0.5 else None,
+            text=f'Пост №{i} для бенчмарка ленты',
+            pub_date=now - timedelta(minutes=posts - i),
+        )
+        for i in range(posts)
+    )
+    for batch in batched(new_posts, BATCH_SIZE):
+        Post.objects.bulk_create(batch)
+    post_ids = Post.objects.aggregate(first=Min('id'), last=Max('id'))
+    new_comments = (
+        Comment(
+            post_id=rnd.randint(post_ids['first'], post_ids['last']),
+            author_id=rnd.choice(user_ids),
+            text=f'Комментарий №{i}',
+            created=now - timedelta(seconds=comments - i),
+        )
+        for i in range(comments)
+    )
+    for batch in batched(new_comments, BATCH_SIZE):
+        Comment.objects.bulk_create(batch)
+    pairs = set()
+    while len(pairs) < min(follows, len(user_ids) * (len(user_ids) - 1)):
+        user_id, author_id = rnd.sample(user_ids, 2)
+        pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        (Follow(user_id=user_id, author_id=author_id)
+         for user_id, author_id in sorted(pairs)),
+        batch_size=BATCH_SIZE,
+    )
+    for user_id, author_id in sorted(pairs):
+        timeline.backfill(user_id, author_id)
+    call_command('reconcile_counters', stdout=StringIO())
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, math.ceil(len(ordered) * percent / 100) - 1)
+    return ordered[index]
+
+
+def sample_urls():
+    """По одному URL на каждый маршрут posts/urls.py и пользователь,
+    от имени которого их стоит запрашивать."""
+    user = User.objects.annotate(
+        following_num=Count('follower', distinct=True)
+    ).filter(posts__isnull=False).order_by('-following_num').first()
+    post = Post.objects.filter(author=user).latest('pub_date')
+    group = (Group.objects.filter(creator=user).first()
+             or Group.objects.first())
+    follow = Follow.objects.filter(user=user).select_related('author').first()
+    author = follow.author if follow else User.objects.exclude(
+        pk=user.pk).first()
+    kwargs = {
+        'slug': group.slug,
+        'username': user.username,
+        'post_id': post.id,
+        'kind': 'atom',
+    }
+    urls = {}
+    for pattern in posts_urls.urlpatterns:
+        params = {
+            name: kwargs[name] for name in pattern.pattern.converters
+        }
+        if pattern.name in ('profile_follow', 'profile_unfollow'):
+            params['username'] = author.username
+        urls[pattern.name] = reverse(f'posts:{pattern.name}', kwargs=params)
+    return user, urls
+
+
+def measure(client, url, requests=50, warmup=1):
+    """Задержки и число SQL-запросов для GET url.
+
+    Каждый запрос выполняется в откатываемой транзакции, поэтому
+    изменяющие данные адреса не портят набор данных между замерами.
+    Очищается только кеш BENCHMARK_CACHES, см. run_benchmark.
+    """
+    cache.clear()
+    timings = []
+    queries = []
+    statuses = set()
+    for number in range(warmup + requests):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+        if number < warmup:
+            cold = elapsed
+            continue
+        timings.append(elapsed)
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+    return {
+        'url': url,
+        'status': sorted(statuses),
+        'cold_ms': round(cold, 3) if warmup else None,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries': max(queries),
+    }
+
+
+def run_benchmark(requests=50, warmup=1):
+    user, urls = sample_urls()
+    client = Client()
+    client.force_login(user)
+    with override_settings(CACHES=BENCHMARK_CACHES):
+        return {
+            name: measure(client, url, requests, warmup)
+            for name, url in urls.items()
+        }
+
+
+def session_cookie(user):
+    client = Client()
+    client.force_login(user)
+    name = settings.SESSION_COOKIE_NAME
+    return f'{name}={client.cookies[name].value}'
+
+
+def wsgi_get(handler, path, cookie):
+    environ = {'PATH_INFO': path, 'HTTP_COOKIE': cookie}
+    setup_testing_defaults(environ)
+    statuses = []
+    body = handler(
+        environ, lambda status, headers, exc_info=None: statuses.append(
+            status))
+    b''.join(body)
+    body.close()
+    return int(statuses[0].split()[0])
+
+
+async def asgi_get(handler, path, cookie):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await handler(scope, receive, send)
+    return messages[0]['status']
+
+
+def summarize(timings, elapsed):
+    latencies = [latency for _, latency, _ in timings]
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'rps': round(len(timings) / elapsed, 1),
+        'status': sorted({status for _, _, status in timings}),
+    }
+
+
+def run_concurrently(mode, urls, cookie, clients=8, requests=20):
+    """Гоняет clients одновременных клиентов через WSGI- или ASGI-обработчик
+    в том же процессе; каждый клиент requests раз обходит все urls.
+
+    WSGI-клиенты — потоки, как у многопоточного сервера; ASGI-клиенты —
+    задачи одного цикла событий.
+    """
+    timings = []
+
+    def wsgi_client():
+        handler = WSGIHandler()
+        for _ in range(requests):
+            for name, url in urls.items():
+                started = time.perf_counter()
+                status = wsgi_get(handler, url, cookie)
+                timings.append(
+                    (name, (time.perf_counter() - started) * 1000, status))
+
+    async def asgi_client(handler):
+        for _ in range(requests):
+            for name, url in urls.items():
+                started = time.perf_counter()
+                status = await asgi_get(handler, url, cookie)
+                timings.append(
+                    (name, (time.perf_counter() - started) * 1000, status))
+
+    async def asgi_clients():
+        handler = ASGIHandler()
+        await asyncio.gather(*(asgi_client(handler) for _ in range(clients)))
+
+    started = time.perf_counter()
+    if mode == 'wsgi':
+        with ThreadPoolExecutor(clients) as executor:
+            for future in [executor.submit(wsgi_client)
+                           for _ in range(clients)]:
+                future.result()
+    else:
+        asyncio.run(asgi_clients())
+    elapsed = time.perf_counter() - started
+    results = {
+        name: summarize(
+            [timing for timing in timings if timing[0] == name], elapsed)
+        for name in urls
+    }
+    results['total'] = summarize(timings, elapsed)
+    return results
+
+
+@contextmanager
+def render_timer():
+    """Собирает время рендеринга шаблонов страницы в миллисекундах.
+
+    Вложенные рендеры (например, карточки постов из post_cards) входят во
+    время внешнего шаблона и отдельно не учитываются.
+    """
+    timings = []
+    depth = 0
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        nonlocal depth
+        depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            depth -= 1
+            if not depth:
+                timings.append((time.perf_counter() - started) * 1000)
+
+    Template.render = render
+    try:
+        yield timings
+    finally:
+        Template.render = original
+
+
+def run_render_benchmark(requests=50):
+    """Время рендеринга шаблонов на страницах лент при тёплом кеше данных:
+    первый запрос к каждой странице не учитывается."""
+    user, urls = sample_urls()
+    client = Client()
+    client.force_login(user)
+    results = {}
+    for name in FEED_VIEWS:
+        client.get(urls[name])
+        renders = []
+        for _ in range(requests):
+            with render_timer() as timings:
+                client.get(urls[name])
+            renders.append(sum(timings))
+        results[name] = {
+            'url': urls[name],
+            'p50_ms': round(percentile(renders, 50), 3),
+            'p95_ms': round(percentile(renders, 95), 3),
+            'mean_ms': round(statistics.mean(renders), 3),
+        }
+    return results
+
+
+def run_mixed(readers=8, writers=2, requests=20):
+    """Читатели и писатели одновременно, каждый в своём потоке и со своим
+    соединением с базой.
+
+    Читатель requests раз обходит страницы лент, писатель requests раз
+    публикует пост и комментарий к нему. Ошибки вроде «database is locked»
+    попадают в статусы как 500.
+    """
+    _, urls = sample_urls()
+    urls = {name: urls[name] for name in FEED_VIEWS}
+    users = list(User.objects.order_by('id')[:readers + writers])
+    timings = []
+
+    def timed(role, request):
+        started = time.perf_counter()
+        response = request()
+        timings.append((
+            role, (time.perf_counter() - started) * 1000,
+            response.status_code,
+        ))
+        return response
+
+    def client_for(user):
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        return client
+
+    def reader(user):
+        client = client_for(user)
+        try:
+            for _ in range(requests):
+                for url in urls.values():
+                    timed('read', lambda: client.get(url))
+        finally:
+            connections.close_all()
+
+    def writer(user):
+        client = client_for(user)
+        create_url = reverse('posts:post_create')
+        try:
+            for number in range(requests):
+                timed('write', lambda: client.post(
+                    create_url, {'text': f'Пост под нагрузкой №{number}'}))
+                post_id = Post.objects.filter(
+                    author=user).values_list('id', flat=True).first()
+                timed('write', lambda: client.post(
+                    reverse('posts:add_comment', args=(post_id,)),
+                    {'text': 'Комментарий под нагрузкой'}))
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(readers + writers) as executor:
+        futures = [
+            executor.submit(reader, user) for user in users[:readers]
+        ] + [
+            executor.submit(writer, user) for user in users[readers:]
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+    results = {
+        role: summarize(
+            [timing for timing in timings if timing[0] == role], elapsed)
+        for role in ('read', 'write')
+    }
+    results['total'] = summarize(timings, elapsed)
+    return results
@@ -0,0 +1,228 @@
+"""Кеш данных лент с версиями областей.
+
+Ключ каждой записи включает версии областей, от которых она зависит
+(``index``, ``group:<id>``, ``author:<id>``, ``post:<id>`` и общая
+``site``). Сигналы моделей увеличивают версии, и старые записи просто
+перестают читаться, поэтому их можно хранить часами.
+"""
+import hashlib
+import time
+
+from core.metrics import record_cache
+from django.core.cache import cache
+from django.utils.http import quote_etag
+from posts import timeline
+from posts.models import Comment, GroupRanking, Post
+from posts.utils import CursorPaginator, get_page_obj
+
+from yatube.settings import (CACHE_TIMEOUT, COMMENTS_PER_PAGE, POSTS_PER_PAGE,
+                             TRENDING_GROUPS, TRENDING_LENGTH)
+
+SITE = 'site'
+INDEX = 'index'
+TRENDING = 'trending'
+
+
+def version_key(scope):
+    return f'version:{scope}'
+
+
+def get_versions(*scopes):
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        fresh = time.time_ns()
+        for key in missing:
+            cache.add(key, fresh, timeout=None)
+        stored = cache.get_many(missing)
+        versions.update({key: stored.get(key, fresh) for key in missing})
+    return tuple(versions[key] for key in keys)
+
+
+def bump(*scopes):
+    for scope in set(scopes):
+        try:
+            cache.incr(version_key(scope))
+        except ValueError:
+            cache.set(version_key(scope), time.time_ns(), timeout=None)
+
+
+def versioned_key(name, scopes):
+    versions = '.'.join(str(version) for version in get_versions(*scopes))
+    return f'{name}:{versions}'
+
+
+def etag(scopes, *parts):
+    """ETag от версий областей и parts: меняется вместе со всем, что
+    сбрасывает кеш этих областей, и считается без запросов к базе."""
+    versions = get_versions(*scopes)
+    return quote_etag(hashlib.md5(
+        ':'.join(str(part) for part in (*parts, versions)).encode()
+    ).hexdigest())
+
+
+def get_or_set(name, scopes, producer, timeout=CACHE_TIMEOUT):
+    key = versioned_key(name, scopes)
+    value = cache.get(key)
+    record_cache(value is not None)
+    if value is None:
+        value = producer()
+        cache.set(key, value, timeout)
+    return value
+
+
+def stream_through(name, scopes, chunks, timeout=CACHE_TIMEOUT):
+    """Отдаёт chunks и, когда они закончились, кладёт собранную строку в
+    кеш; при попадании отдаёт сохранённую строку одним куском."""
+    key = versioned_key(name, scopes)
+    value = cache.get(key)
+    record_cache(value is not None)
+    if value is not None:
+        yield value
+        return
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(parts), timeout)
+
+
+def page_key(request):
+    """Ключ страницы ленты по проверенному курсору или номеру: мусорные
+    ?cursor= и ?page= попадают в ключ первой или крайней страницы."""
+    position = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE).position(
+        cursor=request.GET.get('cursor'), number=request.GET.get('page'))
+    return hashlib.md5(position.encode()).hexdigest()
+
+
+def card_scopes(post):
+    scopes = [author_card_scope(post.author_id)]
+    if post.group_id:
+        scopes.append(group_card_scope(post.group_id))
+    return scopes
+
+
+def card_keys(posts):
+    """Ключи отрендеренных карточек. Post.version растёт при правке поста
+    и новых комментариях; смена фото автора или группы увеличивает версию
+    их области, а не переписывает строки постов. Версии всех областей
+    страницы читаются одним get_many."""
+    scopes = sorted({scope for post in posts for scope in card_scopes(post)})
+    versions = dict(zip(scopes, get_versions(*scopes)))
+    return [
+        'post_card:{}:{}:{}'.format(
+            post.id, post.version,
+            '.'.join(str(versions[scope]) for scope in card_scopes(post)),
+        )
+        for post in posts
+    ]
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def group_card_scope(group_id):
+    return f'group_card:{group_id}'
+
+
+def author_card_scope(author_id):
+    return f'author_card:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def post_scopes(post):
+    scopes = [INDEX, author_scope(post.author_id), post_scope(post.id)]
+    if post.group_id:
+        scopes.append(group_scope(post.group_id))
+    return scopes
+
+
+def get_index_page(request):
+    return get_or_set(
+        f'index_page:{page_key(request)}',
+        (SITE, INDEX),
+        lambda: get_page_obj(request, Post.objects.for_feed()),
+    )
+
+
+def get_group_page(request, group):
+    return get_or_set(
+        f'group_page:{group.id}:{page_key(request)}',
+        (SITE, group_scope(group.id)),
+        lambda: get_page_obj(request, group.posts.for_feed()),
+    )
+
+
+def get_profile_page(request, author):
+    return get_or_set(
+        f'profile:{author.id}:{page_key(request)}',
+        (SITE, author_scope(author.id)),
+        lambda: get_page_obj(
+            request, Post.objects.filter(author=author).for_feed()),
+    )
+
+
+def follow_scopes(user_id):
+    """Лента подписок меняется с любым постом и с подписками читателя,
+    а они увеличивают версию его области автора."""
+    return SITE, INDEX, author_scope(user_id)
+
+
+def get_follow_page(request, user):
+    return get_or_set(
+        f'follow_page:{user.id}:{page_key(request)}',
+        follow_scopes(user.id),
+        lambda: get_page_obj(request, timeline.get_feed(user)),
+    )
+
+
+def get_trending():
+    """Посты и группы из рейтингов, собранных командой update_rankings."""
+    def produce():
+        return {
+            'posts': list(
+                Post.objects.filter(ranking__isnull=False).select_related(
+                    'author__profile', 'group').order_by('-ranking__score')[
+                        :TRENDING_LENGTH]
+            ),
+            'groups': list(
+                GroupRanking.objects.select_related('group').order_by(
+                    '-score')[:TRENDING_GROUPS]
+            ),
+        }
+    return get_or_set('trending', (SITE, INDEX, TRENDING), produce)
+
+
+def get_post_data(post_id):
+    """Пост со связанными объектами; пустой словарь, если поста нет."""
+    def produce():
+        post = Post.objects.select_related(
+            'author__profile', 'group').filter(id=post_id).first()
+        return {'post': post} if post else {}
+    return get_or_set(
+        f'post:{post_id}', (SITE, post_scope(post_id)), produce)
+
+
+def get_comments_page(post_id, cursor=None):
+    """Страница комментариев поста в порядке (created, id)."""
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_PER_PAGE,
+        ordering=('created', 'id'),
+    )
+    position = hashlib.md5(
+        paginator.position(cursor=cursor).encode()).hexdigest()
+    return get_or_set(
+        f'comments:{post_id}:{position}',
+        (SITE, post_scope(post_id)),
+        lambda: paginator.get_page(cursor=cursor),
+    )
@@ -0,0 +1,10 @@
+from posts.notifications import get_unread_count
+
+
+def notifications(request):
+    """Число непрочитанных уведомлений; читается из кеша, и только если
+    шаблон его выводит."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications': lambda: get_unread_count(user.id)}
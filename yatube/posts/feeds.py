@@ -0,0 +1,204 @@
+"""Ленты Atom, RSS 2.0 и JSON Feed.
+
+Документ собирается по частям из итератора по постам и отдаётся через
+``StreamingHttpResponse``; по пути части копятся и попадают в кеш
+с версиями областей, так что следующий опрос отдаётся из кеша, а опрос
+с совпавшим ETag получает 304.
+"""
+import json
+from io import StringIO
+
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+from posts import cache
+
+from yatube.settings import CHARS_SHOWN, FEED_LENGTH
+
+
+class Feed:
+    content_type = None
+
+    def __init__(self, request, title, link, description, updated):
+        self.request = request
+        self.title = title
+        self.link = request.build_absolute_uri(link)
+        self.feed_url = request.build_absolute_uri(request.path)
+        self.description = description
+        self.updated = updated
+
+    def post_url(self, post):
+        return self.request.build_absolute_uri(
+            reverse('posts:post_detail', kwargs={'post_id': post.id}))
+
+    def post_title(self, post):
+        return Truncator(post.text).words(CHARS_SHOWN)
+
+    def write(self, posts):
+        yield self.start()
+        for post in posts:
+            yield self.item(post)
+        yield self.end()
+
+
+class XmlFeed(Feed):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buffer = StringIO()
+        self.xml = SimplerXMLGenerator(self.buffer, 'utf-8')
+
+    def flush(self):
+        value = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return value
+
+
+class AtomFeed(XmlFeed):
+    content_type = 'application/atom+xml; charset=utf-8'
+
+    def start(self):
+        self.xml.startDocument()
+        self.xml.startElement(
+            'feed', {'xmlns': 'http://www.w3.org/2005/Atom', 'xml:lang': 'ru'})
+        self.xml.addQuickElement('title', self.title)
+        self.xml.addQuickElement('subtitle', self.description)
+        self.xml.addQuickElement(
+            'link', '', {'rel': 'alternate', 'href': self.link})
+        self.xml.addQuickElement(
+            'link', '', {'rel': 'self', 'href': self.feed_url})
+        self.xml.addQuickElement('id', self.feed_url)
+        if self.updated:
+            self.xml.addQuickElement('updated', rfc3339_date(self.updated))
+        return self.flush()
+
+    def item(self, post):
+        url = self.post_url(post)
+        self.xml.startElement('entry', {})
+        self.xml.addQuickElement('title', self.post_title(post))
+        self.xml.addQuickElement('link', '', {'href': url})
+        self.xml.addQuickElement('id', url)
+        self.xml.addQuickElement('published', rfc3339_date(post.pub_date))
+        self.xml.addQuickElement('updated', rfc3339_date(post.pub_date))
+        self.xml.startElement('author', {})
+        self.xml.addQuickElement('name', post.author.username)
+        self.xml.endElement('author')
+        self.xml.addQuickElement('content', post.text, {'type': 'text'})
+        self.xml.endElement('entry')
+        return self.flush()
+
+    def end(self):
+        self.xml.endElement('feed')
+        return self.flush()
+
+
+class RssFeed(XmlFeed):
+    content_type = 'application/rss+xml; charset=utf-8'
+
+    def start(self):
+        self.xml.startDocument()
+        self.xml.startElement('rss', {
+            'version': '2.0',
+            'xmlns:atom': 'http://www.w3.org/2005/Atom',
+            'xmlns:dc': 'http://purl.org/dc/elements/1.1/',
+        })
+        self.xml.startElement('channel', {})
+        self.xml.addQuickElement('title', self.title)
+        self.xml.addQuickElement('link', self.link)
+        self.xml.addQuickElement('description', self.description)
+        self.xml.addQuickElement('language', 'ru')
+        self.xml.addQuickElement(
+            'atom:link', '', {'rel': 'self', 'href': self.feed_url})
+        if self.updated:
+            self.xml.addQuickElement(
+                'lastBuildDate', rfc2822_date(self.updated))
+        return self.flush()
+
+    def item(self, post):
+        url = self.post_url(post)
+        self.xml.startElement('item', {})
+        self.xml.addQuickElement('title', self.post_title(post))
+        self.xml.addQuickElement('link', url)
+        self.xml.addQuickElement('guid', url)
+        self.xml.addQuickElement('pubDate', rfc2822_date(post.pub_date))
+        self.xml.addQuickElement('dc:creator', post.author.username)
+        self.xml.addQuickElement('description', post.text)
+        self.xml.endElement('item')
+        return self.flush()
+
+    def end(self):
+        self.xml.endElement('channel')
+        self.xml.endElement('rss')
+        return self.flush()
+
+
+class JsonFeed(Feed):
+    content_type = 'application/feed+json; charset=utf-8'
+
+    def start(self):
+        self.separator = ''
+        header = json.dumps({
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.title,
+            'home_page_url': self.link,
+            'feed_url': self.feed_url,
+            'description': self.description,
+            'language': 'ru',
+        }, ensure_ascii=False)
+        return header[:-1] + ', "items": ['
+
+    def item(self, post):
+        url = self.post_url(post)
+        chunk = self.separator + json.dumps({
+            'id': url,
+            'url': url,
+            'title': self.post_title(post),
+            'content_text': post.text,
+            'date_published': post.pub_date.isoformat(),
+            'authors': [{'name': post.author.username}],
+        }, ensure_ascii=False)
+        self.separator = ', '
+        return chunk
+
+    def end(self):
+        return ']}'
+
+
+FEEDS = {
+    'atom': AtomFeed,
+    'rss': RssFeed,
+    'json': JsonFeed,
+}
+
+
+def feed_response(request, kind, name, scopes, posts, title, link,
+                  description=''):
+    """Лента или 304, если ETag от версий областей совпал.
+
+    Last-Modified не отдаётся: правка поста не меняет дату самого свежего
+    поста, и клиент получил бы 304 со старым текстом.
+    """
+    if kind not in FEEDS:
+        raise Http404
+    etag = cache.etag(scopes, name, kind, request.get_host())
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+    updated = cache.get_or_set(
+        f'feed_updated:{name}', scopes,
+        lambda: posts.values_list('pub_date', flat=True).first(),
+    )
+    feed = FEEDS[kind](request, title, link, description, updated)
+    response = StreamingHttpResponse(
+        cache.stream_through(
+            f'feed:{name}:{kind}:{request.get_host()}',
+            scopes,
+            feed.write(posts[:FEED_LENGTH].iterator()),
+        ),
+        content_type=feed.content_type,
+    )
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,92 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from posts.benchmarks import (FEED_VIEWS, benchmark_database, run_concurrently,
+                              sample_urls, seed, session_cookie)
+
+from yatube.settings import BASE_DIR
+
+MODES = ('wsgi', 'asgi')
+COLUMNS = ('p50_ms', 'p99_ms', 'rps')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает синхронные страницы лент под WSGI и асинхронные '
+            'под ASGI при одновременных клиентах. Каждый режим '
+            'запускается в отдельном процессе со своей временной базой.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=500)
+        parser.add_argument(
+            '--with-cache', action='store_true',
+            help='не отключать кеш лент, по умолчанию мерится база'
+        )
+        parser.add_argument('--output', default='bench_asgi.json')
+        parser.add_argument('--child', choices=MODES, help='внутренний')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            results = self.measure(options['child'], options)
+            self.stdout.write(json.dumps(results))
+            return
+        report = {mode: self.spawn(mode, options) for mode in MODES}
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(
+            f"{'view':<14}"
+            + ''.join(f'{mode}:{column}'.rjust(16)
+                      for mode in MODES for column in COLUMNS)
+        )
+        for name in report['wsgi']:
+            self.stdout.write(f'{name:<14}' + ''.join(
+                f'{report[mode][name][column]:>16}'
+                for mode in MODES for column in COLUMNS
+            ))
+        self.stdout.write(f"Результаты сохранены в {options['output']}")
+
+    def spawn(self, mode, options):
+        command = [
+            sys.executable, os.path.join(BASE_DIR, 'manage.py'),
+            'bench_asgi', '--child', mode,
+        ]
+        for name in ('clients', 'requests', 'users', 'posts', 'comments',
+                     'follows'):
+            command += [f'--{name}', str(options[name])]
+        if options['with_cache']:
+            command.append('--with-cache')
+        env = dict(
+            os.environ, ASYNC_FEED_VIEWS=str(mode == 'asgi'))
+        process = subprocess.run(
+            command, env=env, capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError(process.stderr)
+        return json.loads(process.stdout.splitlines()[-1])
+
+    def measure(self, mode, options):
+        caches = None if options['with_cache'] else {'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with benchmark_database(), override_settings(
+                **({'CACHES': caches} if caches else {})):
+            seed(
+                users=options['users'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows=options['follows'],
+            )
+            user, urls = sample_urls()
+            return run_concurrently(
+                mode,
+                {name: urls[name] for name in FEED_VIEWS},
+                session_cookie(user),
+                options['clients'],
+                options['requests'],
+            )
@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from posts.benchmarks import benchmark_database, run_mixed, seed
+
+from yatube.settings import BASE_DIR
+
+SQLITE_MODES = ('delete', 'wal')
+COLUMNS = ('p50_ms', 'p99_ms', 'rps')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пропускную способность при одновременных чтении лент '
+            'и публикации постов. Для SQLite сравнивает журнал DELETE и '
+            'WAL, каждый режим — в отдельном процессе со своей базой.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=4000)
+        parser.add_argument('--follows', type=int, default=200)
+        parser.add_argument(
+            '--with-cache', action='store_true',
+            help='не отключать кеш лент, по умолчанию мерится база'
+        )
+        parser.add_argument('--output', default='bench_db.json')
+        parser.add_argument('--child', help='внутренний')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            self.stdout.write(json.dumps(self.measure(options)))
+            return
+        modes = (
+            SQLITE_MODES if connection.vendor == 'sqlite'
+            else (connection.vendor,)
+        )
+        report = {mode: self.spawn(mode, options) for mode in modes}
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(
+            f"{'mode':<10}{'role':<8}"
+            + ''.join(f'{column:>12}' for column in COLUMNS)
+            + f"{'status':>16}"
+        )
+        for mode, results in report.items():
+            for role, result in results.items():
+                self.stdout.write(
+                    f'{mode:<10}{role:<8}'
+                    + ''.join(f'{result[column]:>12}' for column in COLUMNS)
+                    + f"{str(result['status']):>16}"
+                )
+        self.stdout.write(f"Результаты сохранены в {options['output']}")
+
+    def spawn(self, mode, options):
+        command = [
+            sys.executable, os.path.join(BASE_DIR, 'manage.py'),
+            'bench_db', '--child', mode,
+        ]
+        for name in ('readers', 'writers', 'requests', 'users', 'posts',
+                     'comments', 'follows'):
+            command += [f'--{name}', str(options[name])]
+        if options['with_cache']:
+            command.append('--with-cache')
+        env = dict(os.environ)
+        if mode in SQLITE_MODES:
+            env['SQLITE_JOURNAL_MODE'] = mode.upper()
+        process = subprocess.run(
+            command, env=env, capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError(process.stderr)
+        return json.loads(process.stdout.splitlines()[-1])
+
+    def measure(self, options):
+        caches = None if options['with_cache'] else {'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with tempfile.TemporaryDirectory() as directory:
+            name = (
+                os.path.join(directory, 'bench.sqlite3')
+                if connection.vendor == 'sqlite' else None
+            )
+            with benchmark_database(name=name), override_settings(
+                    **({'CACHES': caches} if caches else {})):
+                seed(
+                    users=options['users'],
+                    posts=options['posts'],
+                    comments=options['comments'],
+                    follows=options['follows'],
+                )
+                return run_mixed(
+                    options['readers'], options['writers'],
+                    options['requests'])
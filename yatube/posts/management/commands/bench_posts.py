@@ -0,0 +1,73 @@
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.benchmarks import benchmark_database, run_benchmark, seed
+from posts.models import Post
+
+COLUMNS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries')
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержки (p50/p95/p99) и число SQL-запросов для '
+            'каждого адреса posts/urls.py на временной базе и сохраняет '
+            'результат в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--output', default='bench_posts.json')
+        parser.add_argument(
+            '--compare', help='JSON предыдущего запуска для сравнения')
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        dataset = {
+            name: options[name]
+            for name in ('users', 'groups', 'posts', 'comments', 'follows')
+        }
+        with benchmark_database(keepdb=options['keepdb']):
+            if not options['keepdb'] or not Post.objects.exists():
+                seed(**dataset)
+            results = run_benchmark(options['requests'], options['warmup'])
+        report = {
+            'commit': current_commit(),
+            'created': timezone.now().isoformat(),
+            'dataset': dataset,
+            'requests': options['requests'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        previous = {}
+        if options['compare']:
+            with open(options['compare']) as compared:
+                previous = json.load(compared)['results']
+        self.stdout.write(
+            f"{'view':<20}" + ''.join(f'{name:>18}' for name in COLUMNS))
+        for name, result in results.items():
+            row = f'{name:<20}'
+            for column in COLUMNS:
+                cell = f'{result[column]}'
+                if name in previous:
+                    cell += f' ({result[column] - previous[name][column]:+g})'
+                row += f'{cell:>18}'
+            self.stdout.write(row)
+        self.stdout.write(f"Результаты сохранены в {options['output']}")
@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from posts.benchmarks import benchmark_database, run_render_benchmark, seed
+
+from yatube.settings import BASE_DIR
+
+MODES = ('uncached', 'cached')
+COLUMNS = ('p50_ms', 'p95_ms')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время рендеринга шаблонов страниц лент без '
+            'кеширующего загрузчика и с ним. Каждый режим запускается в '
+            'отдельном процессе со своей временной базой.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=4000)
+        parser.add_argument('--follows', type=int, default=200)
+        parser.add_argument('--output', default='bench_templates.json')
+        parser.add_argument('--child', choices=MODES, help='внутренний')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            with benchmark_database():
+                seed(
+                    users=options['users'],
+                    posts=options['posts'],
+                    comments=options['comments'],
+                    follows=options['follows'],
+                )
+                results = run_render_benchmark(options['requests'])
+            self.stdout.write(json.dumps(results))
+            return
+        report = {mode: self.spawn(mode, options) for mode in MODES}
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(
+            f"{'view':<14}"
+            + ''.join(f'{mode}:{column}'.rjust(20)
+                      for mode in MODES for column in COLUMNS)
+        )
+        for name in report['uncached']:
+            self.stdout.write(f'{name:<14}' + ''.join(
+                f'{report[mode][name][column]:>20}'
+                for mode in MODES for column in COLUMNS
+            ))
+        self.stdout.write(f"Результаты сохранены в {options['output']}")
+
+    def spawn(self, mode, options):
+        command = [
+            sys.executable, os.path.join(BASE_DIR, 'manage.py'),
+            'bench_templates', '--child', mode,
+        ]
+        for name in ('requests', 'users', 'posts', 'comments', 'follows'):
+            command += [f'--{name}', str(options[name])]
+        env = dict(os.environ, CACHED_TEMPLATES=str(mode == 'cached'))
+        process = subprocess.run(
+            command, env=env, capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError(process.stderr)
+        return json.loads(process.stdout.splitlines()[-1])
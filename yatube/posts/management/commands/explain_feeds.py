@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts import timeline
+from posts.benchmarks import benchmark_database, seed
+from posts.models import Comment, Follow, Post
+from posts.utils import CursorPaginator
+from yatube.settings import POSTS_PER_PAGE
+
+INDEXED_MODELS = (Post, Comment, Follow)
+
+
+def feed_queries():
+    """Запросы, которые выполняют представления posts/views.py."""
+    post = Post.objects.order_by('-comments_count').first()
+    follow = Follow.objects.order_by('?').first()
+    middle = Post.objects.order_by('-pub_date')[Post.objects.count() // 2]
+    paginator = CursorPaginator(Post.objects.for_feed(), POSTS_PER_PAGE)
+    limit = POSTS_PER_PAGE + 1
+    return {
+        'index': Post.objects.for_feed()[:limit],
+        'index, deep cursor': paginator.seek(
+            [middle.pub_date, middle.id])[:limit],
+        'group_posts': Post.objects.filter(
+            group=post.group_id or 0).for_feed()[:limit],
+        'profile': Post.objects.filter(
+            author=post.author_id).for_feed()[:limit],
+        'profile, following': Follow.objects.filter(
+            user=follow.user_id, author=follow.author_id),
+        'post_detail': Comment.objects.filter(
+            post=post).select_related('author'),
+        'follow_index': timeline.get_feed(follow.user_id)[:limit],
+        'timeline fan-out': Follow.objects.filter(
+            author=follow.author_id).values_list('user_id', flat=True),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Наполняет временную базу и печатает планы (EXPLAIN) запросов '
+            'лент без индексов и с индексами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument('--follows', type=int, default=1000)
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            if not options['keepdb'] or not Post.objects.exists():
+                self.stdout.write('Наполнение базы...')
+                seed(
+                    users=options['users'],
+                    groups=options['groups'],
+                    posts=options['posts'],
+                    comments=options['comments'],
+                    follows=options['follows'],
+                )
+            with transaction.atomic():
+                self.drop_indexes()
+                before = self.explain()
+                transaction.set_rollback(True)
+            after = self.explain()
+        for name in before:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write('без индексов:')
+            self.stdout.write(before[name])
+            self.stdout.write('с индексами:')
+            self.stdout.write(after[name])
+            self.stdout.write('')
+
+    def drop_indexes(self):
+        editor = connection.schema_editor(collect_sql=True)
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    cursor.execute(str(index.remove_sql(model, editor)))
+
+    def explain(self):
+        return {
+            name: queryset.explain()
+            for name, queryset in feed_queries().items()
+        }
@@ -0,0 +1,53 @@
+import sys
+import time
+from itertools import chain
+
+from django.core.management.base import BaseCommand, CommandError
+from posts.transfer import FIELDS, export_records, write_csv, write_ndjson
+
+PROGRESS_EVERY = 10000
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает посты, комментарии и подписки в NDJSON '
+            'или CSV.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл выгрузки, «-» — stdout')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default='ndjson')
+        parser.add_argument(
+            '--models', nargs='+', choices=tuple(FIELDS),
+            default=list(FIELDS),
+            help='CSV вмещает только одну модель'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        models = options['models']
+        if options['format'] == 'csv' and len(models) != 1:
+            raise CommandError('Для CSV укажите одну модель в --models.')
+        records = chain.from_iterable(
+            export_records(name, options['chunk_size']) for name in models)
+        if options['path'] == '-':
+            self.export(sys.stdout, records, options)
+        else:
+            with open(options['path'], 'w', encoding='utf-8',
+                      newline='') as stream:
+                self.export(stream, records, options)
+
+    def export(self, stream, records, options):
+        if options['format'] == 'csv':
+            written = write_csv(stream, options['models'][0], records)
+        else:
+            written = write_ndjson(stream, records)
+        started = time.perf_counter()
+        total = 0
+        for total, name in enumerate(written, 1):
+            if total % PROGRESS_EVERY == 0:
+                self.report(name, total, started)
+        self.report('всего', total, started)
+
+    def report(self, name, total, started):
+        rate = total / max(time.perf_counter() - started, 1e-9)
+        self.stderr.write(f'{name}: {total} строк, {rate:.0f} строк/с')
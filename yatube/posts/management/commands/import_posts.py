@@ -0,0 +1,68 @@
+import os
+import sys
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from posts import timeline
+from posts.transfer import (FIELDS, RecordError, import_records, read_csv,
+                            read_ndjson)
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает посты, комментарии и подписки из NDJSON '
+            'или CSV пачками через bulk_create, затем пересчитывает '
+            'счётчики и ленты подписок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл загрузки, «-» — stdin')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='по умолчанию определяется по расширению файла'
+        )
+        parser.add_argument(
+            '--model', choices=tuple(FIELDS), help='модель строк CSV')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='пропускать строки с уже существующими ключами'
+        )
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='не пересчитывать счётчики и ленты подписок'
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or (
+            'csv' if options['path'].endswith('.csv') else 'ndjson')
+        if file_format == 'csv' and not options['model']:
+            raise CommandError('Для CSV укажите --model.')
+        if options['path'] == '-':
+            self.load(sys.stdin, file_format, options)
+        else:
+            if not os.path.exists(options['path']):
+                raise CommandError(f'Файл {options["path"]} не найден.')
+            with open(options['path'], encoding='utf-8',
+                      newline='') as stream:
+                self.load(stream, file_format, options)
+        if not options['skip_rebuild']:
+            call_command('reconcile_counters', stdout=StringIO())
+            timeline.rebuild()
+            self.stdout.write('Счётчики и ленты подписок пересчитаны.')
+
+    def load(self, stream, file_format, options):
+        if file_format == 'csv':
+            records = read_csv(stream, options['model'])
+        else:
+            records = read_ndjson(stream)
+        total = 0
+        try:
+            for name, total, rate in import_records(
+                records, options['batch_size'], options['ignore_conflicts']
+            ):
+                self.stdout.write(
+                    f'{name}: {total} строк, {rate:.0f} строк/с')
+        except RecordError as error:
+            raise CommandError(
+                f'{error} Загружено строк до ошибки: {total}.')
+        self.stdout.write(self.style.SUCCESS(f'Загружено строк: {total}'))
@@ -0,0 +1,33 @@
+from core import images
+from django.core.management.base import BaseCommand
+from posts.models import Post, Profile
+
+from yatube.settings import POST_IMAGE_WIDTHS, PROFILE_PHOTO_WIDTHS
+
+BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии уже загруженных картинок.'
+
+    def handle(self, *args, **options):
+        sources = (
+            (Post.objects.exclude(image='').values_list('image', flat=True),
+             POST_IMAGE_WIDTHS),
+            (Profile.objects.values_list('photo', flat=True).distinct(),
+             PROFILE_PHOTO_WIDTHS),
+        )
+        processed = 0
+        for names, widths in sources:
+            futures = []
+            for name in names.iterator():
+                futures.append(images.get_executor().submit(
+                    images.process_safely, name, widths))
+                if len(futures) == BATCH_SIZE:
+                    processed += self.wait(futures)
+                    futures = []
+            processed += self.wait(futures)
+        self.stdout.write(f'Обработано картинок: {processed}')
+
+    def wait(self, futures):
+        return sum(future.result() is not None for future in futures)
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts import cache
+from posts.models import Comment, Follow, Post, Profile, User
+
+BATCH_SIZE = 1000
+
+
+def count_of(model, field, outer):
+    counted = model.objects.filter(**{field: OuterRef(outer)}).order_by(
+    ).values(field).annotate(num=Count('pk')).values('num')
+    return Coalesce(Subquery(counted), 0)
+
+
+COUNTERS = (
+    (Profile, 'posts_count', count_of(Post, 'author', 'user')),
+    (Profile, 'followers_count', count_of(Follow, 'author', 'user')),
+    (Profile, 'following_count', count_of(Follow, 'user', 'user')),
+    (Post, 'comments_count', count_of(Comment, 'post', 'pk')),
+)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает денормализованные счётчики постов, комментариев '
+            'и подписок и исправляет расхождения.')
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.bulk_create(
+            (Profile(user=user) for user in User.objects.filter(
+                profile__isnull=True).iterator()),
+            batch_size=BATCH_SIZE,
+        )
+        if profiles:
+            self.stdout.write(f'Созданы профили: {len(profiles)}')
+        for model, field, actual in COUNTERS:
+            fixed = self.reconcile(model, field, actual)
+            self.stdout.write(
+                f'{model._meta.object_name}.{field}: исправлено {fixed}')
+        cache.bump(cache.SITE)
+
+    def reconcile(self, model, field, actual):
+        """Проходит таблицу пачками по первичному ключу, чтобы не держать
+        открытый курсор во время обновлений."""
+        fixed = 0
+        last_pk = 0
+        while True:
+            chunk = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk').annotate(
+                    actual=actual
+                ).values_list('pk', field, 'actual')[:BATCH_SIZE]
+            )
+            if not chunk:
+                return fixed
+            last_pk = chunk[-1][0]
+            drifted = [
+                model(pk=pk, **{field: value})
+                for pk, stored, value in chunk if stored != value
+            ]
+            with transaction.atomic():
+                model.objects.bulk_update(drifted, (field,))
+            fixed += len(drifted)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = ('Раздаёт посты авторов, опустившихся до TIMELINE_FANOUT_LIMIT, '
+            'и обрезает ленты подписок до TIMELINE_LENGTH последних записей. '
+            'Рассчитана на запуск по расписанию, например раз в час из cron.')
+
+    def handle(self, *args, **options):
+        filled = timeline.fill_pending()
+        trimmed = timeline.trim_all()
+        self.stdout.write(
+            f'Раздано авторов: {filled}, обрезано лент: {trimmed}')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from posts import rankings
+
+
+class Command(BaseCommand):
+    help = ('Обновляет рейтинги «В тренде» и популярных групп по событиям '
+            'с прошлого запуска. Рассчитана на запуск по расписанию, '
+            'например раз в несколько минут из cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='пересобрать рейтинги заново'
+        )
+
+    def handle(self, *args, **options):
+        posts, groups = rankings.update(full=options['full'])
+        self.stdout.write(
+            f'Обновлены счета постов: {posts}, групп: {groups}')
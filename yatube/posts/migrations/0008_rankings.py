@@ -0,0 +1,46 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_comment_cursor_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupRanking',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='posts.group', verbose_name='группа')),
+                ('score', models.FloatField(verbose_name='счёт')),
+                ('updated', models.DateTimeField(verbose_name='дата пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг группы',
+                'verbose_name_plural': 'Рейтинги групп',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostRanking',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='posts.post', verbose_name='пост')),
+                ('score', models.FloatField(verbose_name='счёт')),
+                ('updated', models.DateTimeField(verbose_name='дата пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг поста',
+                'verbose_name_plural': 'Рейтинги постов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postranking',
+            index=models.Index(fields=['-score'], name='post_ranking_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupranking',
+            index=models.Index(fields=['-score'], name='group_ranking_score_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:28
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def merge_unread_duplicates(apps, schema_editor):
+    """Складывает дубли непрочитанных уведомлений в самую свежую запись,
+    иначе уникальные индексы не создадутся."""
+    Notification = apps.get_model('posts', 'Notification')
+    duplicates = Notification.objects.filter(read=False).values(
+        'recipient', 'kind', 'post'
+    ).annotate(
+        rows=Count('id'), total=Sum('count'), latest=Max('id')
+    ).filter(rows__gt=1)
+    for group in duplicates:
+        Notification.objects.filter(
+            read=False, recipient=group['recipient'], kind=group['kind'],
+            post=group['post'],
+        ).exclude(pk=group['latest']).delete()
+        Notification.objects.filter(pk=group['latest']).update(
+            count=group['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_comment_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_unread_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('post__isnull', False), ('read', False)), fields=('recipient', 'kind', 'post'), name='notification_unread_post_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('post__isnull', True), ('read', False)), fields=('recipient', 'kind'), name='notification_unread_uniq'),
+        ),
+    ]
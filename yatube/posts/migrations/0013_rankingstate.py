@@ -0,0 +1,25 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_notification_unread_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_run', models.DateTimeField(verbose_name='прошлый запуск')),
+                ('counted', models.JSONField(default=dict, verbose_name='учтённые события')),
+            ],
+            options={
+                'verbose_name': 'Состояние рейтингов',
+                'verbose_name_plural': 'Состояния рейтингов',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_rankingstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='timeline_pending',
+            field=models.BooleanField(default=False, editable=False, verbose_name='посты ждут раздачи по лентам'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.18 on 2026-10-18 19:52
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.utils.timezone
+
+# Изменение поля тоже пересоздаёт posts_post в SQLite.
+restore_search_triggers = import_module(
+    'posts.migrations.0009_post_version').restore_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_profile_timeline_pending'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Дата создания'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='дата публикации'),
+        ),
+        migrations.RunPython(
+            restore_search_triggers, restore_search_triggers),
+    ]
@@ -1,13 +1,37 @@
 from core.models import CreatedModel
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.timezone import now
 
 from yatube.settings import CHARS_SHOWN
 
 User = get_user_model()
 
 
-class Profile(models.Model):
+class CountersModel(models.Model):
+    """Абстрактная модель со счётчиками, которые меняются только
+    атомарными ``F()``-обновлениями из сигналов.
+
+    Обычный ``save()`` существующего объекта не перезаписывает счётчики,
+    иначе он затёр бы значения, изменившиеся после загрузки объекта.
+    """
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Profile(CountersModel):
     user = models.OneToOneField(
         User,
         on_delete=models.CASCADE,
@@ -24,6 +48,29 @@ class Profile(models.Model):
         verbose_name='описание профиля',
         blank=True,
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='число постов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='число подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='число подписок',
+    )
+    timeline_pending = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='посты ждут раздачи по лентам',
+    )
+
+    counter_fields = ('posts_count', 'followers_count', 'following_count',
+                      'timeline_pending')
 
 
 class Group(models.Model):
@@ -48,10 +95,20 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты вместе с автором, его профилем и группой — всё, что нужно
+        карточке ленты, одним запросом."""
+        return self.select_related(
+            'author__profile', 'group'
+        ).order_by('-pub_date', '-id')
+
+
+class Post(CountersModel):
     text = models.TextField(verbose_name='текст')
     pub_date = models.DateTimeField(
-        auto_now_add=True,
+        default=now,
+        editable=False,
         verbose_name='дата публикации',
     )
     author = models.ForeignKey(
@@ -73,9 +130,37 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True,
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='число комментариев',
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='версия карточки',
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    counter_fields = ('comments_count', 'version')
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx'
+            ),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -99,6 +184,13 @@ class Comment(CreatedModel):
     text = models.TextField(verbose_name='текст')
 
     class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'created', 'id'),
+                name='comment_post_created_id_idx'
+            ),
+            models.Index(fields=('-created',), name='comment_created_idx'),
+        )
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -124,5 +216,158 @@ class Follow(models.Model):
                 name='unique_following'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_user_idx'
+            ),
+        )
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='пост',
+    )
+    pub_date = models.DateTimeField(verbose_name='дата публикации')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date'),
+                name='timeline_user_pub_date_idx'
+            ),
+        )
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+
+class PostRanking(models.Model):
+    """Счёт поста в рейтинге «В тренде», см. posts/rankings.py."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='пост',
+    )
+    score = models.FloatField(verbose_name='счёт')
+    updated = models.DateTimeField(verbose_name='дата пересчёта')
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('-score',), name='post_ranking_score_idx'),
+        )
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+
+
+class GroupRanking(models.Model):
+    """Счёт активности группы, см. posts/rankings.py."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='группа',
+    )
+    score = models.FloatField(verbose_name='счёт')
+    updated = models.DateTimeField(verbose_name='дата пересчёта')
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('-score',), name='group_ranking_score_idx'),
+        )
+        verbose_name = 'Рейтинг группы'
+        verbose_name_plural = 'Рейтинги групп'
+
+
+class RankingState(models.Model):
+    """Состояние пересчёта рейтингов, см. posts/rankings.py: время прошлого
+    запуска и события из перекрытия окон, которые уже учтены."""
+    last_run = models.DateTimeField(verbose_name='прошлый запуск')
+    counted = models.JSONField(
+        default=dict, verbose_name='учтённые события')
+
+    class Meta:
+        verbose_name = 'Состояние рейтингов'
+        verbose_name_plural = 'Состояния рейтингов'
+
+
+class Notification(models.Model):
+    """Сводное уведомление: события одного вида по одному посту
+    копятся в одной непрочитанной записи, см. posts/notifications.py.
+    Уникальность непрочитанных записей держит база."""
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    KINDS = (
+        (COMMENT, 'комментарии'),
+        (FOLLOW, 'подписчики'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='получатель',
+    )
+    kind = models.CharField(
+        max_length=10, choices=KINDS, verbose_name='вид')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='notifications',
+        verbose_name='пост',
+    )
+    last_actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='последний автор события',
+    )
+    count = models.PositiveIntegerField(
+        default=1, verbose_name='число событий')
+    updated = models.DateTimeField(verbose_name='последнее событие')
+    read = models.BooleanField(default=False, verbose_name='прочитано')
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('recipient', 'read', '-updated'),
+                name='notification_recipient_idx'
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipient', 'kind', 'post'),
+                condition=models.Q(read=False, post__isnull=False),
+                name='notification_unread_post_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=('recipient', 'kind'),
+                condition=models.Q(read=False, post__isnull=True),
+                name='notification_unread_uniq'
+            ),
+        )
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
@@ -0,0 +1,157 @@
+"""Уведомления о новых комментариях и подписчиках.
+
+События не пишутся в базу по одному: они копятся в буфере процесса,
+где одинаковые (получатель, вид, пост) складываются в одно. Буфер
+сбрасывается, когда в нём NOTIFICATION_BUFFER_SIZE записей или прошло
+NOTIFICATION_FLUSH_INTERVAL секунд, и при сбросе каждая группа событий
+одним INSERT ... ON CONFLICT прибавляет свои n событий к непрочитанной
+записи или создаёт новую. Уникальность непрочитанных записей держат
+частичные уникальные индексы Notification, поэтому воркеры не создают
+дублей. Число непрочитанных кешируется с версией области получателя.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from posts import cache
+from posts.models import Notification, Post
+
+from yatube.settings import (NOTIFICATION_BUFFER_SIZE,
+                             NOTIFICATION_FLUSH_INTERVAL)
+
+logger = logging.getLogger(__name__)
+
+UPSERT = '''
+    INSERT INTO {table} ({recipient}, {kind}, {post}, {actor}, {count},
+                         {updated}, {read})
+    SELECT %s, %s, %s, %s, %s, %s, %s
+    WHERE {exists}
+    ON CONFLICT ({conflict}) WHERE {predicate}
+    DO UPDATE SET {count} = {table}.{count} + excluded.{count},
+                  {actor} = excluded.{actor},
+                  {updated} = excluded.{updated}
+    RETURNING {count}
+'''
+
+lock = threading.Lock()
+buffer = {}
+last_flush = time.monotonic()
+
+
+def unread_scope(user_id):
+    return f'notifications:{user_id}'
+
+
+def notify(recipient_id, kind, post_id=None, actor_id=None):
+    """Добавляет событие в буфер после коммита текущей транзакции."""
+    transaction.on_commit(
+        lambda: add(recipient_id, kind, post_id, actor_id))
+
+
+def add(recipient_id, kind, post_id=None, actor_id=None):
+    key = (recipient_id, kind, post_id)
+    with lock:
+        count, _, _ = buffer.get(key, (0, None, None))
+        buffer[key] = (count + 1, actor_id, timezone.now())
+        due = len(buffer) >= NOTIFICATION_BUFFER_SIZE
+    if due:
+        flush()
+
+
+def flush_if_due(**kwargs):
+    if buffer and (
+            time.monotonic() - last_flush >= NOTIFICATION_FLUSH_INTERVAL):
+        flush()
+
+
+def upsert_sql(with_post):
+    quote = connection.ops.quote_name
+    columns = {
+        name: quote(Notification._meta.get_field(name).column)
+        for name in ('recipient', 'kind', 'post', 'count', 'updated', 'read')
+    }
+    columns['actor'] = quote(
+        Notification._meta.get_field('last_actor').column)
+    conflict = ('recipient', 'kind', 'post') if with_post else (
+        'recipient', 'kind')
+    predicate = (
+        f"{columns['post']} IS {'NOT ' if with_post else ''}NULL "
+        f"AND NOT {columns['read']}"
+    )
+    # Пост мог быть удалён раньше, чем событие записалось.
+    exists = 'EXISTS (SELECT 1 FROM {} WHERE {} = %s)'.format(
+        quote(Post._meta.db_table), quote(Post._meta.pk.column),
+    ) if with_post else 'TRUE'
+    return UPSERT.format(
+        table=quote(Notification._meta.db_table),
+        exists=exists,
+        conflict=', '.join(columns[name] for name in conflict),
+        predicate=predicate,
+        **columns,
+    )
+
+
+def flush():
+    """Записывает буфер одной транзакцией, по запросу на группу событий."""
+    global buffer, last_flush
+    with lock:
+        events, buffer = buffer, {}
+        last_flush = time.monotonic()
+    if not events:
+        return
+    created = set()
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            for key, (count, actor_id, updated) in events.items():
+                recipient_id, kind, post_id = key
+                params = [
+                    recipient_id, kind, post_id, actor_id, count,
+                    connection.ops.adapt_datetimefield_value(updated), False,
+                ]
+                if post_id is not None:
+                    params.append(post_id)
+                cursor.execute(upsert_sql(post_id is not None), params)
+                row = cursor.fetchone()
+                if row is not None and row[0] == count:
+                    created.add(recipient_id)
+    except DatabaseError:
+        logger.exception('Не удалось записать %d уведомлений', len(events))
+        requeue(events)
+        return
+    cache.bump(*(unread_scope(user_id) for user_id in created))
+
+
+def requeue(events):
+    with lock:
+        for key, (count, actor_id, updated) in events.items():
+            if key in buffer:
+                pending, actor_id, updated = buffer[key]
+                count += pending
+            buffer[key] = (count, actor_id, updated)
+
+
+def get_unread_count(user_id):
+    """Число непрочитанных. Ключ кеша включает версию области получателя,
+    которую сброс буфера увеличивает после вставки: подсчёт, начатый до
+    вставки, сохранится под старой версией и читаться не будет."""
+    return cache.get_or_set(
+        f'notifications:unread:{user_id}', (unread_scope(user_id),),
+        lambda: Notification.objects.filter(
+            recipient=user_id, read=False).count(),
+    )
+
+
+def mark_read(user_id, ids=None):
+    """Отмечает прочитанными уведомления ids или все сразу одним UPDATE."""
+    notifications = Notification.objects.filter(recipient=user_id, read=False)
+    if ids is not None:
+        notifications = notifications.filter(pk__in=ids)
+    marked = notifications.update(read=True)
+    cache.bump(unread_scope(user_id))
+    return marked
+
+
+atexit.register(flush)
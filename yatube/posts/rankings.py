@@ -0,0 +1,137 @@
+"""Рейтинги «В тренде» и популярных групп.
+
+Счёт — сумма весов событий (пост, комментарий), затухающих с периодом
+полураспада TRENDING_HALF_LIFE. Хранится логарифм этой суммы, умноженной
+на ``e^((t - EPOCH) / τ)``: множитель затухания общий для всех строк,
+поэтому порядок не меняется со временем, старые счета не пересчитываются,
+а новое событие добавляется одним ``logaddexp``.
+
+Пересчёт идёт в одной транзакции вместе с записью RankingState. Окно
+каждого запуска начинается на OVERLAP раньше прошлого, чтобы не пропустить
+события из транзакций, закоммиченных после него; уже учтённые события
+из перекрытия помнит RankingState.counted, и повторно они не считаются.
+"""
+import math
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from posts import cache as posts_cache
+from posts.models import (Comment, GroupRanking, Post, PostRanking,
+                          RankingState)
+
+from yatube.settings import TRENDING_HALF_LIFE, TRENDING_MIN_SCORE
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+TAU = TRENDING_HALF_LIFE.total_seconds() / math.log(2)
+WINDOW = timedelta(seconds=TAU * math.log(1 / TRENDING_MIN_SCORE))
+OVERLAP = timedelta(minutes=5)
+BATCH_SIZE = 1000
+
+
+def log_weight(moment, weight=1):
+    return math.log(weight) + (moment - EPOCH).total_seconds() / TAU
+
+
+def logaddexp(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_score(score, now=None):
+    """Сумма весов событий с учётом затухания на момент now."""
+    return math.exp(score - log_weight(now or timezone.now()))
+
+
+def collect(*events):
+    """Логарифмические счета по ключам из потоков пар (ключ, момент)."""
+    scores = {}
+    for stream in events:
+        for key, moment in stream:
+            value = log_weight(moment)
+            scores[key] = (
+                logaddexp(scores[key], value) if key in scores else value)
+    return scores
+
+
+def unseen(rows, seen, recent, cutoff):
+    """Пары (ключ, момент) из строк (id, ключ, момент), id которых нет в
+    seen. id событий позже cutoff добавляются в recent."""
+    for pk, key, moment in rows:
+        if moment > cutoff:
+            recent.add(pk)
+        if pk not in seen:
+            yield key, moment
+
+
+def merge(model, scores, now):
+    keys = list(scores)
+    for start in range(0, len(keys), BATCH_SIZE):
+        chunk = keys[start:start + BATCH_SIZE]
+        stored = dict(
+            model.objects.filter(pk__in=chunk).values_list('pk', 'score'))
+        updated = [
+            model(pk=key, score=logaddexp(stored[key], scores[key]),
+                  updated=now)
+            for key in chunk if key in stored
+        ]
+        created = [
+            model(pk=key, score=scores[key], updated=now)
+            for key in chunk if key not in stored
+        ]
+        model.objects.bulk_update(updated, ('score', 'updated'))
+        model.objects.bulk_create(created, ignore_conflicts=True)
+
+
+def update(now=None, full=False):
+    """Добавляет события с прошлого запуска и удаляет затухшие счета.
+
+    Время прошлого запуска хранится в RankingState; если его нет или full,
+    рейтинги собираются заново по событиям за окно WINDOW.
+    """
+    now = now or timezone.now()
+    cutoff = now - OVERLAP
+    with transaction.atomic():
+        state, created = RankingState.objects.select_for_update(
+        ).get_or_create(pk=1, defaults={'last_run': now})
+        if full or created:
+            since, counted = now - WINDOW, {}
+            PostRanking.objects.all().delete()
+            GroupRanking.objects.all().delete()
+        else:
+            since, counted = state.last_run - OVERLAP, state.counted
+        seen_posts = set(counted.get('posts', ()))
+        seen_comments = set(counted.get('comments', ()))
+        recent_posts, recent_comments = set(), set()
+        posts = Post.objects.filter(pub_date__gt=since, pub_date__lte=now)
+        comments = Comment.objects.filter(
+            created__gt=since, created__lte=now)
+        post_scores = collect(
+            unseen(
+                posts.values_list('id', 'id', 'pub_date').iterator(),
+                seen_posts, recent_posts, cutoff,
+            ),
+            unseen(
+                comments.values_list('id', 'post_id', 'created').iterator(),
+                seen_comments, recent_comments, cutoff,
+            ),
+        )
+        group_scores = collect(unseen(
+            posts.filter(group__isnull=False).values_list(
+                'id', 'group_id', 'pub_date').iterator(),
+            seen_posts, set(), cutoff,
+        ))
+        merge(PostRanking, post_scores, now)
+        merge(GroupRanking, group_scores, now)
+        threshold = log_weight(now, TRENDING_MIN_SCORE)
+        PostRanking.objects.filter(score__lt=threshold).delete()
+        GroupRanking.objects.filter(score__lt=threshold).delete()
+        state.last_run = now
+        state.counted = {
+            'posts': sorted(recent_posts),
+            'comments': sorted(recent_comments),
+        }
+        state.save()
+        transaction.on_commit(
+            lambda: posts_cache.bump(posts_cache.TRENDING))
+    return len(post_scores), len(group_scores)
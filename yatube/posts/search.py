@@ -0,0 +1,147 @@
+"""Полнотекстовый поиск по постам.
+
+SQLite использует FTS5-таблицу ``posts_post_fts``, PostgreSQL — GIN-индекс
+по ``to_tsvector``; обе структуры создаёт миграция 0006. Для остальных
+баз остаётся медленный ``icontains``. Выдача ранжирована и листается
+курсором по паре (ранг, id).
+"""
+import base64
+import binascii
+import json
+import math
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+from posts.utils import INT64_MAX, INT64_MIN, CursorPage
+
+from yatube.settings import POSTS_PER_PAGE
+
+START, STOP = '\x02', '\x03'
+SEARCH_CONFIG = 'russian'
+
+
+def encode_cursor(rank, post_id):
+    data = json.dumps([rank, post_id]).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        rank, post_id = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        rank, post_id = float(rank), int(post_id)
+    except (binascii.Error, ValueError, TypeError, OverflowError):
+        return None
+    if not math.isfinite(rank) or not INT64_MIN <= post_id <= INT64_MAX:
+        return None
+    return rank, post_id
+
+
+def highlight(text):
+    """Экранирует текст и превращает маркеры совпадений в <mark>."""
+    return mark_safe(
+        escape(text).replace(START, '<mark>').replace(STOP, '</mark>'))
+
+
+def fts_query(query):
+    """Запрос FTS5 из слов пользователя: все слова обязательны,
+    последнее ищется по префиксу."""
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_sqlite(query, position, limit):
+    match = fts_query(query)
+    if match is None:
+        return []
+    sql = (
+        'SELECT rowid, rank, highlight(posts_post_fts, 0, %s, %s) '
+        'FROM posts_post_fts WHERE posts_post_fts MATCH %s'
+    )
+    params = [START, STOP, match]
+    if position:
+        sql += ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+        params += [position[0], position[0], position[1]]
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search_postgresql(query, position, limit):
+    from django.contrib.postgres.search import (SearchHeadline, SearchQuery,
+                                                SearchRank, SearchVector)
+    from django.db.models import F, Q
+
+    search_query = SearchQuery(
+        query, config=SEARCH_CONFIG, search_type='websearch')
+    # Ранг берётся со знаком минус, чтобы курсор, как и в SQLite,
+    # шёл по возрастанию (ранг, id).
+    posts = Post.objects.annotate(
+        document=SearchVector('text', config=SEARCH_CONFIG),
+    ).filter(document=search_query).annotate(
+        rank=-SearchRank(F('document'), search_query),
+        headline=SearchHeadline(
+            'text', search_query, config=SEARCH_CONFIG,
+            start_sel=START, stop_sel=STOP, highlight_all=True,
+        ),
+    )
+    if position:
+        posts = posts.filter(
+            Q(rank__gt=position[0])
+            | Q(rank=position[0], id__gt=position[1]))
+    return list(posts.order_by('rank', 'id').values_list(
+        'id', 'rank', 'headline')[:limit])
+
+
+def search_fallback(query, position, limit):
+    posts = Post.objects.filter(text__icontains=query)
+    if position:
+        posts = posts.filter(id__lt=position[1])
+    return [
+        (post_id, 0.0, text.replace(query, f'{START}{query}{STOP}'))
+        for post_id, text in posts.order_by('-id').values_list(
+            'id', 'text')[:limit]
+    ]
+
+
+BACKENDS = {
+    'sqlite': search_sqlite,
+    'postgresql': search_postgresql,
+}
+
+
+def search(query, cursor=None, per_page=POSTS_PER_PAGE):
+    """Страница результатов поиска; у постов есть атрибут highlight."""
+    query = query.strip()
+    if not query:
+        return CursorPage([])
+    position = decode_cursor(cursor) if cursor else None
+    backend = BACKENDS.get(connection.vendor, search_fallback)
+    rows = backend(query, position, per_page + 1)
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.for_feed().in_bulk([row[0] for row in rows])
+    results = []
+    for post_id, rank, text in rows:
+        post = posts.get(post_id)
+        if post is not None:
+            post.highlight = highlight(text)
+            results.append(post)
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return CursorPage(
+        results,
+        next_cursor=next_cursor,
+        has_previous=position is not None,
+    )
@@ -0,0 +1,200 @@
+from core import images
+from django.core.signals import request_finished
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from posts import cache, notifications, timeline
+from posts.models import (Comment, Follow, Group, Notification, Post, Profile,
+                          User)
+
+from yatube.settings import POST_IMAGE_WIDTHS, PROFILE_PHOTO_WIDTHS
+
+IMAGE_FIELDS = {
+    Post: ('image', POST_IMAGE_WIDTHS),
+    Profile: ('photo', PROFILE_PHOTO_WIDTHS),
+}
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, **kwargs):
+    if created:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def count_posts(sender, instance, **kwargs):
+    if 'created' in kwargs and not kwargs['created']:
+        return
+    step = 1 if kwargs.get('created') else -1
+    Profile.objects.filter(user=instance.author_id).update(
+        posts_count=F('posts_count') + step)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def count_comments(sender, instance, **kwargs):
+    if 'created' in kwargs and not kwargs['created']:
+        return
+    step = 1 if kwargs.get('created') else -1
+    Post.objects.filter(pk=instance.post_id).update(
+        comments_count=F('comments_count') + step,
+        version=F('version') + 1,
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def count_follows(sender, instance, **kwargs):
+    if 'created' in kwargs and not kwargs['created']:
+        return
+    step = 1 if kwargs.get('created') else -1
+    Profile.objects.filter(user=instance.author_id).update(
+        followers_count=F('followers_count') + step)
+    Profile.objects.filter(user=instance.user_id).update(
+        following_count=F('following_count') + step)
+
+
+@receiver(post_save, sender=Post)
+def push_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        timeline.push(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    timeline.remove(instance.user_id, instance.author_id)
+
+
+def bump_versions(posts):
+    """Устаревшие карточки постов перестают читаться из кеша."""
+    posts.update(version=F('version') + 1)
+
+
+@receiver(post_save, sender=Post)
+def bump_post_version(sender, instance, created, **kwargs):
+    if not created:
+        bump_versions(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def bump_group_cards(sender, instance, **kwargs):
+    if not kwargs.get('created'):
+        cache.bump(cache.group_card_scope(instance.pk))
+
+
+@receiver(post_save, sender=Profile)
+def bump_author_cards(sender, instance, created, **kwargs):
+    if not created and getattr(instance, '_image_uploaded', False):
+        cache.bump(cache.author_card_scope(instance.user_id))
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    if instance.pk and not instance._state.adding:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    scopes = cache.post_scopes(instance)
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id:
+        scopes.append(cache.group_scope(previous_group_id))
+    cache.bump(*scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    if Comment.post.is_cached(instance):
+        post = instance.post
+    else:
+        post = Post.objects.filter(pk=instance.post_id).only(
+            'author_id', 'group_id').first()
+    if post is not None:
+        cache.bump(*cache.post_scopes(post))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, **kwargs):
+    cache.bump(
+        cache.author_scope(instance.author_id),
+        cache.author_scope(instance.user_id),
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_site(sender, instance, **kwargs):
+    cache.bump(cache.SITE)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Profile)
+def remember_upload(sender, instance, **kwargs):
+    field_name, _ = IMAGE_FIELDS[sender]
+    image = getattr(instance, field_name)
+    instance._image_uploaded = bool(image) and not image._committed
+    if instance._image_uploaded:
+        images.strip_exif(image)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Profile)
+def process_upload(sender, instance, **kwargs):
+    if getattr(instance, '_image_uploaded', False):
+        field_name, widths = IMAGE_FIELDS[sender]
+        images.schedule(
+            getattr(instance, field_name).name,
+            widths,
+            on_done=lambda: refresh_cards(sender, instance),
+        )
+
+
+def refresh_cards(sender, instance):
+    """Когда готовы уменьшенные копии, карточки собираются с srcset."""
+    if sender is Post:
+        bump_versions(Post.objects.filter(pk=instance.pk))
+        cache.bump(*cache.post_scopes(instance))
+    else:
+        cache.bump(cache.author_card_scope(instance.user_id), cache.SITE)
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment(sender, instance, created, **kwargs):
+    if not created:
+        return
+    if Comment.post.is_cached(instance):
+        author_id = instance.post.author_id
+    else:
+        author_id = Post.objects.filter(pk=instance.post_id).values_list(
+            'author_id', flat=True).first()
+    if author_id and author_id != instance.author_id:
+        notifications.notify(
+            author_id, Notification.COMMENT, instance.post_id,
+            instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def notify_follow(sender, instance, created, **kwargs):
+    if created:
+        notifications.notify(
+            instance.author_id, Notification.FOLLOW,
+            actor_id=instance.user_id)
+
+
+request_finished.connect(notifications.flush_if_due)
@@ -0,0 +1,39 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from posts.cache import card_keys
+
+from yatube.settings import CACHE_TIMEOUT
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Карточки постов: готовые берутся из кеша одним get_many,
+    недостающие рендерятся и сохраняются одним set_many.
+
+    Карточка не зависит от читателя. Посты с подсветкой поиска
+    рендерятся каждый раз и не кешируются.
+    """
+    posts = list(posts)
+    keys = card_keys(posts)
+    cached = cache.get_many([
+        key for post, key in zip(posts, keys)
+        if not getattr(post, 'highlight', None)
+    ])
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        card = cached.get(key)
+        if card is None:
+            card = render_to_string(CARD_TEMPLATE, {'post': post})
+            if not getattr(post, 'highlight', None):
+                rendered[key] = card
+        cards.append(card)
+    if rendered:
+        cache.set_many(rendered, CACHE_TIMEOUT)
+    return mark_safe(''.join(cards))
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from core.pagination import estimate_count
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', password='pass')
+        cls.group = Group.objects.create(
+            creator=cls.admin, title='Группа', slug='group')
+        cls.create_rows(5)
+
+    @classmethod
+    def create_rows(cls, number):
+        start = User.objects.count()
+        for i in range(start, start + number):
+            author = User.objects.create_user(username=f'user{i}')
+            post = Post.objects.create(
+                author=author, group=cls.group, text=f'Пост {i}')
+            Comment.objects.create(post=post, author=cls.admin, text='Ответ')
+            Follow.objects.create(user=cls.admin, author=author)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow(self):
+        urls = {
+            model: reverse(
+                f'admin:posts_{model._meta.model_name}_changelist')
+            for model in (Post, Comment, Follow)
+        }
+        self.changelist_queries(urls[Post])
+        before = {
+            model: self.changelist_queries(url)
+            for model, url in urls.items()
+        }
+        self.create_rows(5)
+        for model, url in urls.items():
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.changelist_queries(url), before[model])
+
+    def test_estimated_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimate_count(Post), Post.objects.count())
+        Post.objects.create(author=self.admin, text='После ANALYZE')
+        url = reverse('admin:posts_post_changelist')
+        with mock.patch('core.pagination.ADMIN_EXACT_COUNT_LIMIT', 1):
+            response = self.client.get(url)
+        self.assertEqual(
+            response.context['cl'].result_count, Post.objects.count() - 1)
+        self.assertIsNone(response.context['cl'].full_result_count)
+
+    def test_filtered_count_is_bounded(self):
+        url = reverse('admin:posts_post_changelist')
+        with mock.patch('core.pagination.ADMIN_EXACT_COUNT_LIMIT', 3):
+            response = self.client.get(url, {'q': 'Пост'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_date_hierarchy(self):
+        post = Post.objects.first()
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'),
+            {'pub_date__year': post.pub_date.year},
+        )
+        self.assertContains(response, post.text)
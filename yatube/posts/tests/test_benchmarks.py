@@ -0,0 +1,52 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from posts.benchmarks import (FEED_VIEWS, run_benchmark, run_render_benchmark,
+                              seed)
+from posts.urls import urlpatterns
+
+QUERY_BUDGETS = {
+    'index': 2,
+    'group_list': 3,
+    'profile': 4,
+    'post_detail': 2,
+    'follow_index': 4,
+}
+
+
+class BenchmarkSuiteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed(users=20, groups=3, posts=60, comments=100, follows=40)
+
+    def test_every_url_is_measured(self):
+        results = run_benchmark(requests=3)
+        self.assertEqual(
+            set(results), {pattern.name for pattern in urlpatterns})
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertLess(
+                    max(result['status']),
+                    HTTPStatus.INTERNAL_SERVER_ERROR
+                )
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_feed_query_budgets(self):
+        results = run_benchmark(requests=2)
+        for name, budget in QUERY_BUDGETS.items():
+            with self.subTest(name=name):
+                self.assertLessEqual(results[name]['queries'], budget)
+
+    def test_real_cache_not_cleared(self):
+        cache.set('benchmark:sentinel', 1)
+        run_benchmark(requests=1)
+        self.assertEqual(cache.get('benchmark:sentinel'), 1)
+
+    def test_render_benchmark(self):
+        results = run_render_benchmark(requests=2)
+        self.assertEqual(set(results), set(FEED_VIEWS))
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertGreater(result['p50_ms'], 0)
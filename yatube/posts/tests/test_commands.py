@@ -0,0 +1,253 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import rankings
+from ..models import (Comment, Follow, Group, GroupRanking, Post, PostRanking,
+                      Profile, RankingState, TimelineEntry)
+
+User = get_user_model()
+
+
+class ReconcileCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        Comment.objects.create(
+            post=cls.post, author=cls.follower, text='Комментарий')
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def test_counters_follow_changes(self):
+        profile = Profile.objects.get(user=ReconcileCountersTest.user)
+        self.assertEqual(profile.posts_count, 1)
+        self.assertEqual(profile.followers_count, 1)
+        self.assertEqual(
+            Profile.objects.get(
+                user=ReconcileCountersTest.follower).following_count,
+            1
+        )
+        self.assertEqual(
+            Post.objects.get(pk=ReconcileCountersTest.post.pk).comments_count,
+            1
+        )
+
+    def test_reconcile_counters_fixes_drift(self):
+        Profile.objects.update(
+            posts_count=7, followers_count=7, following_count=7)
+        Post.objects.update(comments_count=7)
+        Profile.objects.filter(user=ReconcileCountersTest.follower).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        profile = Profile.objects.get(user=ReconcileCountersTest.user)
+        self.assertEqual(
+            (profile.posts_count, profile.followers_count,
+             profile.following_count),
+            (1, 1, 0)
+        )
+        self.assertEqual(
+            Profile.objects.get(
+                user=ReconcileCountersTest.follower).following_count,
+            1
+        )
+        self.assertEqual(
+            Post.objects.get(pk=ReconcileCountersTest.post.pk).comments_count,
+            1
+        )
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.follower, text='Комментарий')
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def export(self, name, *args):
+        path = os.path.join(self.directory, name)
+        call_command('export_posts', path, *args, stderr=StringIO())
+        return path
+
+    def test_ndjson_round_trip(self):
+        path = self.export('dump.ndjson')
+        snapshot = list(Post.objects.values_list('id', 'text', 'pub_date'))
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+        out = StringIO()
+        call_command('import_posts', path, '--batch-size', '2', stdout=out)
+        self.assertIn('строк/с', out.getvalue())
+        self.assertEqual(
+            list(Post.objects.values_list('id', 'text', 'pub_date')),
+            snapshot
+        )
+        self.assertEqual(Comment.objects.get().text, 'Комментарий')
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(), 3)
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual(
+            (profile.posts_count, profile.followers_count), (3, 1))
+        self.assertEqual(
+            Post.objects.get(pk=self.posts[0].pk).comments_count, 1)
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertGreater(post.pk, self.posts[-1].pk)
+
+    def test_csv_round_trip(self):
+        path = self.export('follows.csv', '--format', 'csv',
+                           '--models', 'follow')
+        Follow.objects.all().delete()
+        call_command('import_posts', path, '--model', 'follow',
+                     stdout=StringIO())
+        self.assertTrue(Follow.objects.filter(
+            user=self.follower, author=self.user).exists())
+
+    def test_malformed_input_reports_line(self):
+        path = os.path.join(self.directory, 'broken.ndjson')
+        valid = json.dumps({'model': 'post', 'id': 100, 'author': self.user.pk,
+                            'text': 'Пост', 'pub_date': '2022-12-22T13:10'})
+        cases = {
+            '{"model": "post", "id": ': 'некорректный JSON',
+            json.dumps({'model': 'post', 'id': 101, 'author': 999,
+                        'text': 'Пост'}): 'author 999 не найден',
+            json.dumps({'model': 'post', 'id': 101, 'author': self.user.pk,
+                        'group': 999, 'text': 'Пост'}): 'group 999 не найден',
+            json.dumps({'model': 'post', 'id': 101, 'author': self.user.pk,
+                        'text': 'Пост', 'pub_date': 'вчера'}): 'pub_date',
+        }
+        for line, message in cases.items():
+            with self.subTest(message=message):
+                with open(path, 'w', encoding='utf-8') as stream:
+                    stream.write(f'{valid}\n\n{line}\n')
+                with self.assertRaises(CommandError) as context:
+                    call_command('import_posts', path, '--skip-rebuild',
+                                 stdout=StringIO())
+                self.assertTrue(str(context.exception).startswith('Строка 3'))
+                self.assertIn(message, str(context.exception))
+                self.assertFalse(Post.objects.filter(pk=100).exists())
+
+    def test_csv_error_reports_line(self):
+        path = os.path.join(self.directory, 'follows.csv')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(f'id,user,author\n100,{self.user.pk},'
+                         f'{self.follower.pk}\n101,{self.user.pk},abc\n')
+        with self.assertRaisesMessage(CommandError, 'Строка 3: author'):
+            call_command('import_posts', path, '--model', 'follow',
+                         '--skip-rebuild', stdout=StringIO())
+
+
+class TrimTimelinesTest(TestCase):
+    def test_long_timelines_trimmed(self):
+        author = User.objects.create_user(username='auth')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        posts = [
+            Post.objects.create(author=author, text=f'Пост {number}')
+            for number in range(4)
+        ]
+        self.assertEqual(TimelineEntry.objects.count(), 4)
+        with mock.patch('posts.timeline.TIMELINE_LENGTH', 2):
+            call_command('trim_timelines', stdout=StringIO())
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('post', flat=True)),
+            {posts[2].pk, posts[3].pk}
+        )
+
+
+class RankingsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            creator=cls.user, title='Группа', slug='group')
+        cls.quiet = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тихий пост')
+        cls.discussed = Post.objects.create(
+            author=cls.user, text='Обсуждаемый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post, number=1):
+        for _ in range(number):
+            Comment.objects.create(
+                post=post, author=self.user, text='Комментарий')
+
+    def test_comments_raise_score_incrementally(self):
+        self.comment(self.discussed, 3)
+        now = timezone.now() + timedelta(seconds=1)
+        call_command('update_rankings', stdout=StringIO())
+        self.assertEqual(
+            list(PostRanking.objects.order_by('-score').values_list(
+                'post', flat=True)),
+            [self.discussed.pk, self.quiet.pk]
+        )
+        self.assertEqual(GroupRanking.objects.get().group, self.group)
+        score = PostRanking.objects.get(pk=self.quiet.pk).score
+        self.assertAlmostEqual(rankings.current_score(score, now), 1, 3)
+        self.comment(self.quiet, 5)
+        rankings.update(now=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(
+            PostRanking.objects.order_by('-score').first().pk, self.quiet.pk)
+        self.assertAlmostEqual(
+            rankings.current_score(
+                PostRanking.objects.get(pk=self.quiet.pk).score, now), 6, 3)
+
+    def test_overlapping_runs_idempotent(self):
+        now = timezone.now() + timedelta(seconds=1)
+        rankings.update(now=now)
+        scores = dict(PostRanking.objects.values_list('pk', 'score'))
+        rankings.update(now=now + timedelta(seconds=1))
+        self.assertEqual(
+            dict(PostRanking.objects.values_list('pk', 'score')), scores)
+        self.assertEqual(RankingState.objects.get().last_run,
+                         now + timedelta(seconds=1))
+
+    def test_late_commit_counted(self):
+        now = timezone.now() + timedelta(seconds=1)
+        rankings.update(now=now)
+        late = Comment.objects.create(
+            post=self.quiet, author=self.user, text='Поздний')
+        Comment.objects.filter(pk=late.pk).update(
+            created=now - timedelta(seconds=1))
+        rankings.update(now=now + timedelta(seconds=1))
+        self.assertAlmostEqual(
+            rankings.current_score(
+                PostRanking.objects.get(pk=self.quiet.pk).score, now), 2, 3)
+
+    def test_scores_decay(self):
+        rankings.update()
+        score = PostRanking.objects.get(pk=self.quiet.pk).score
+        later = timezone.now() + rankings.TRENDING_HALF_LIFE
+        self.assertAlmostEqual(rankings.current_score(score, later), 0.5, 3)
+        rankings.update(now=later + rankings.WINDOW)
+        self.assertFalse(PostRanking.objects.exists())
+
+    def test_trending_page(self):
+        self.comment(self.discussed)
+        rankings.update(now=timezone.now() + timedelta(seconds=1))
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(
+            response.context['page_obj'], [self.discussed, self.quiet])
+        self.assertEqual(response.context['groups'][0].group, self.group)
@@ -1,16 +1,29 @@
+import json
 import shutil
 import tempfile
+from io import StringIO
+from xml.etree import ElementTree
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.test import (AsyncRequestFactory, Client, RequestFactory,
+                         TestCase, override_settings)
 from django.urls import reverse
-from posts.models import Comment, Follow, Group, Post
+from django.utils import timezone
+from posts import async_views, notifications
+from posts import cache as posts_cache
+from posts.models import (Comment, Follow, Group, Notification, Post,
+                          Profile, TimelineEntry)
+from posts.utils import CursorPaginator
 
-from yatube.settings import POSTS_PER_PAGE
+from yatube.settings import COMMENTS_PER_PAGE, POSTS_PER_PAGE
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -281,15 +294,501 @@ class PostsViewTests(TestCase):
             user=PostsViewTests.another_user,
             author=PostsViewTests.user).exists())
 
+    def test_follow_index_timeline(self):
+        self.another_auth.get(
+            reverse(
+                'posts:profile_follow',
+                kwargs={'username': PostsViewTests.user.username}
+            )
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=PostsViewTests.another_user).count(),
+            Post.objects.filter(author=PostsViewTests.user).count()
+        )
+        post = Post.objects.create(
+            author=PostsViewTests.user,
+            text='Пост для ленты'
+        )
+        self.assertEqual(
+            self.another_auth.get(
+                reverse('posts:follow_index')).context['page_obj'][0],
+            post
+        )
+        self.another_auth.get(
+            reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': PostsViewTests.user.username}
+            )
+        )
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=PostsViewTests.another_user).exists())
+
+    def test_follow_index_reads_popular_authors(self):
+        Follow.objects.create(
+            user=PostsViewTests.another_user,
+            author=PostsViewTests.yet_another_user
+        )
+        with mock.patch('posts.timeline.TIMELINE_FANOUT_LIMIT', 0):
+            post = Post.objects.create(
+                author=PostsViewTests.yet_another_user,
+                text='Пост популярного автора'
+            )
+            self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+            self.assertEqual(
+                self.another_auth.get(
+                    reverse('posts:follow_index')).context['page_obj'][0],
+                post
+            )
+
+    def test_follow_index_backfilled_below_fanout_limit(self):
+        Follow.objects.create(
+            user=PostsViewTests.another_user,
+            author=PostsViewTests.yet_another_user
+        )
+        follow = Follow.objects.create(
+            user=PostsViewTests.user,
+            author=PostsViewTests.yet_another_user
+        )
+        with mock.patch('posts.timeline.TIMELINE_FANOUT_LIMIT', 1):
+            post = Post.objects.create(
+                author=PostsViewTests.yet_another_user,
+                text='Пост выше порога'
+            )
+            self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+            follow.delete()
+            self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+            call_command('trim_timelines', stdout=StringIO())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=PostsViewTests.another_user, post=post).exists())
+        self.assertFalse(
+            Profile.objects.filter(timeline_pending=True).exists())
+
+    def test_feed_pages_query_count(self):
+        Follow.objects.create(
+            user=PostsViewTests.another_user,
+            author=PostsViewTests.user
+        )
+        for post in Post.objects.all():
+            Comment.objects.create(
+                text='Ещё комментарий',
+                author=PostsViewTests.another_user,
+                post=post
+            )
+        pages_queries = {
+            reverse('posts:index'): 4,
+            reverse(
+                'posts:group_list',
+                kwargs={'slug': PostsViewTests.group.slug}
+            ): 5,
+            reverse(
+                'posts:profile',
+                kwargs={'username': PostsViewTests.user.username}
+            ): 6,
+            reverse('posts:follow_index'): 5,
+        }
+        for url, queries in pages_queries.items():
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    self.another_auth.get(url)
+
+    def test_cursor_pages(self):
+        cache.clear()
+        url = reverse('posts:index')
+        first_page = self.client.get(url).context['page_obj']
+        self.assertFalse(first_page.has_previous())
+        second_page = self.client.get(
+            url, {'cursor': first_page.next_cursor}).context['page_obj']
+        self.assertEqual(
+            len(second_page), Post.objects.count() - POSTS_PER_PAGE)
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            list(self.client.get(
+                url, {'cursor': second_page.previous_cursor}
+            ).context['page_obj']),
+            list(first_page)
+        )
+
+    def test_comments_loaded_by_cursor(self):
+        post = PostsViewTests.post
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {number}',
+                    author=PostsViewTests.another_user, post=post)
+            for number in range(COMMENTS_PER_PAGE + 5)
+        )
+        cache.clear()
+        url = reverse('posts:post_detail', kwargs={'post_id': post.id})
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(comments[0], PostsViewTests.comment)
+        self.assertContains(response, comments.next_cursor)
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': post.id}),
+            {'cursor': comments.next_cursor}
+        )
+        data = response.json()
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['html'].count('<li'), 6)
+        self.assertIn(f'Комментарий {COMMENTS_PER_PAGE + 4}', data['html'])
+        response = self.client.get(url, {'comments': comments.next_cursor})
+        self.assertEqual(len(response.context['comments']), 6)
+
+    def test_cursor_pages_ignore_broken_cursor(self):
+        cache.clear()
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': 'broken'})
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_crafted_cursors_fall_back_to_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+        cursors = [
+            paginator.encode_values([None, 1]),
+            paginator.encode_values(['2020-01-01T00:00:00+00:00', 10 ** 30]),
+            paginator.encode_values(['2020-01-01T00:00:00+00:00', -10 ** 30]),
+        ]
+        post_id = PostsViewTests.post.id
+        requests = (
+            ('posts:index', {}, 'cursor'),
+            ('posts:post_detail', {'post_id': post_id}, 'comments'),
+            ('posts:post_comments', {'post_id': post_id}, 'cursor'),
+            ('posts:search', {}, 'cursor'),
+        )
+        for name, kwargs, param in requests:
+            for cursor in cursors:
+                with self.subTest(name=name, cursor=cursor):
+                    response = self.client.get(
+                        reverse(name, kwargs=kwargs),
+                        {param: cursor, 'q': 'пост'}
+                    )
+                    self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': cursors[1]})
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_page_key_ignores_junk(self):
+        factory = RequestFactory()
+        keys = {
+            posts_cache.page_key(factory.get('/', params))
+            for params in (
+                {}, {'page': '1'}, {'page': '0'}, {'page': 'junk'},
+                {'cursor': 'broken'}, {'cursor': 'eyJ2IjpbMSwyXSwiciI6MH0'},
+            )
+        }
+        self.assertEqual(len(keys), 1)
+
+    def test_feeds(self):
+        cached_queries = {
+            reverse('posts:feed', kwargs={'kind': 'atom'}): 0,
+            reverse('posts:group_feed', kwargs={
+                'slug': PostsViewTests.group.slug, 'kind': 'rss'}): 1,
+            reverse('posts:profile_feed', kwargs={
+                'username': PostsViewTests.user.username, 'kind': 'json'}): 1,
+        }
+        for url, queries in cached_queries.items():
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content).decode()
+                if url.endswith('json/'):
+                    items = json.loads(content)['items']
+                    self.assertEqual(
+                        items[0]['content_text'], PostsViewTests.post.text)
+                else:
+                    ElementTree.fromstring(content)
+                    self.assertIn(PostsViewTests.post.text, content)
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url)
+                    self.assertEqual(
+                        b''.join(response.streaming_content).decode(),
+                        content
+                    )
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:feed', kwargs={'kind': 'xml'})).status_code,
+            404
+        )
+
+    def test_feed_not_modified(self):
+        url = reverse('posts:feed', kwargs={'kind': 'atom'})
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        post = Post.objects.get(pk=PostsViewTests.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'Исправленный пост',
+            b''.join(response.streaming_content).decode()
+        )
+        etag = response['ETag']
+        Post.objects.create(author=PostsViewTests.user, text='Свежий пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'Свежий пост', b''.join(response.streaming_content).decode())
+
+    def test_search(self):
+        url = reverse('posts:search')
+        response = self.client.get(url, {'q': 'тестовый пост'})
+        page = response.context['page_obj']
+        self.assertEqual(len(page), POSTS_PER_PAGE)
+        self.assertIn('<mark>Тестовый</mark>', page[0].highlight)
+        next_page = self.client.get(
+            url, {'q': 'тестовый пост', 'cursor': page.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(
+            len(page) + len(next_page),
+            Post.objects.filter(text__startswith='Тестовый пост').count()
+        )
+        post = PostsViewTests.post
+        post.text = 'Совсем другой <текст>'
+        post.save()
+        page = self.client.get(url, {'q': 'другой'}).context['page_obj']
+        self.assertEqual(list(page), [post])
+        self.assertEqual(
+            page[0].highlight, 'Совсем <mark>другой</mark> &lt;текст&gt;')
+        post.delete()
+        self.assertFalse(
+            self.client.get(url, {'q': 'другой'}).context['page_obj'])
+
     def test_cache(self):
         cache.clear()
         response = self.client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            response_cached = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.content, response_cached.content)
         Post.objects.create(
             author=PostsViewTests.user,
             text='New post'
         )
         response_with_new_post = self.client.get(reverse('posts:index'))
-        self.assertEqual(response.content, response_with_new_post.content)
+        self.assertContains(response_with_new_post, 'New post')
+
+    def test_cache_invalidated_by_comments_and_follows(self):
+        cache.clear()
+        profile_url = reverse(
+            'posts:profile',
+            kwargs={'username': PostsViewTests.user.username}
+        )
+        self.client.get(profile_url)
+        Follow.objects.create(
+            user=PostsViewTests.another_user,
+            author=PostsViewTests.user
+        )
+        self.assertEqual(
+            self.client.get(profile_url).context['followers_num'], 1)
+        detail_url = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': PostsViewTests.post.id}
+        )
+        self.client.get(detail_url)
+        Comment.objects.create(
+            text='Новый комментарий',
+            author=PostsViewTests.another_user,
+            post=PostsViewTests.post
+        )
+        self.assertContains(self.client.get(detail_url), 'Новый комментарий')
+
+
+class PostCardsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            creator=cls.user, title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Карточка')
+
+    def setUp(self):
         cache.clear()
-        response_cleared_cache = self.client.get(reverse('posts:index'))
-        self.assertNotEqual(response.content, response_cleared_cache)
+
+    def test_cards_rendered_once(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.assertIsNotNone(cache.get(posts_cache.card_keys([self.post])[0]))
+        with mock.patch(
+            'posts.templatetags.post_cards.render_to_string'
+        ) as render:
+            response = self.client.get(url)
+        render.assert_not_called()
+        self.assertContains(response, self.post.text)
+
+    def test_cards_follow_changes(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленная карточка'
+        post.save()
+        Comment.objects.create(post=post, author=self.user, text='Ответ')
+        self.group.title = 'Новое название'
+        with self.assertNumQueries(1):
+            self.group.save()
+        content = self.client.get(url).content.decode()
+        self.assertIn('Исправленная карточка', content)
+        self.assertIn('Комментарии 1', content)
+        self.assertIn('#Новое название', content)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).version, 2)
+
+
+@mock.patch('posts.async_views.ASYNC_PARALLEL_QUERIES', False)
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            creator=cls.user, title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Асинхронный пост')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_request(self):
+        request = AsyncRequestFactory().get('/')
+        request.user = self.reader
+        return request
+
+    async def test_feed_views(self):
+        views = (
+            (async_views.index, {}),
+            (async_views.group_posts, {'slug': self.group.slug}),
+            (async_views.profile, {'username': self.user.username}),
+            (async_views.post_detail, {'post_id': self.post.id}),
+        )
+        for view, kwargs in views:
+            with self.subTest(view=view.__name__):
+                response = await view(self.get_request(), **kwargs)
+                self.assertContains(response, self.post.text)
+        response = await async_views.profile(
+            self.get_request(), username=self.user.username)
+        self.assertContains(response, 'Отписаться')
+
+    async def test_post_detail_not_found(self):
+        with self.assertRaises(Http404):
+            await async_views.post_detail(self.get_request(), post_id=0)
+
+
+@mock.patch('posts.notifications.NOTIFICATION_FLUSH_INTERVAL', 3600)
+class NotificationsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        notifications.buffer.clear()
+        self.addCleanup(notifications.buffer.clear)
+        self.client.force_login(self.author)
+
+    def comment(self, author, times=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(times):
+                Comment.objects.create(
+                    post=self.post, author=author, text='Ответ')
+
+    def test_events_coalesced(self):
+        self.comment(self.reader, times=3)
+        self.comment(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.reader, author=self.author)
+        self.assertFalse(Notification.objects.exists())
+        with self.assertNumQueries(4):
+            notifications.flush()
+        notification = Notification.objects.get(kind=Notification.COMMENT)
+        self.assertEqual(notification.count, 3)
+        self.assertEqual(notification.last_actor, self.reader)
+        notifications.add(
+            self.author.id, Notification.COMMENT, self.post.id,
+            self.author.id)
+        notifications.add(
+            self.author.id, Notification.COMMENT, self.post.id,
+            self.author.id)
+        with self.assertNumQueries(3):
+            notifications.flush()
+        notification.refresh_from_db()
+        self.assertEqual(notification.count, 5)
+        self.assertEqual(notification.last_actor, self.author)
+
+    def test_flush_when_buffer_full(self):
+        with mock.patch('posts.notifications.NOTIFICATION_BUFFER_SIZE', 2):
+            self.comment(self.reader)
+            self.assertFalse(Notification.objects.exists())
+            with self.captureOnCommitCallbacks(execute=True):
+                Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_unread_rows_unique(self):
+        self.comment(self.reader)
+        notifications.flush()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(
+                recipient=self.author, kind=Notification.COMMENT,
+                post=self.post, updated=timezone.now())
+
+    def test_event_for_deleted_post_dropped(self):
+        post = Post.objects.create(author=self.author, text='Удалённый')
+        post_id = post.id
+        post.delete()
+        notifications.add(self.author.id, Notification.COMMENT, post_id)
+        notifications.flush()
+        self.assertFalse(Notification.objects.exists())
+
+    def test_follow_notification(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'подписались на вас')
+        self.assertEqual(response.context['unread_notifications'](), 1)
+
+    def test_unread_count_cached(self):
+        self.comment(self.reader)
+        notifications.flush()
+        self.assertEqual(notifications.get_unread_count(self.author.id), 1)
+        with self.assertNumQueries(0):
+            notifications.get_unread_count(self.author.id)
+
+    def test_unread_count_not_lost_to_concurrent_flush(self):
+        def count_then_flush():
+            count = Notification.objects.filter(
+                recipient=self.author.id, read=False).count()
+            self.comment(self.reader)
+            notifications.flush()
+            return count
+
+        with mock.patch('posts.cache.cache.get', return_value=None):
+            self.assertEqual(posts_cache.get_or_set(
+                f'notifications:unread:{self.author.id}',
+                (notifications.unread_scope(self.author.id),),
+                count_then_flush,
+            ), 0)
+        self.assertEqual(notifications.get_unread_count(self.author.id), 1)
+
+    def test_mark_read(self):
+        self.comment(self.reader)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.reader, author=self.author)
+        notifications.flush()
+        comment = Notification.objects.get(kind=Notification.COMMENT)
+        response = self.client.post(
+            reverse('posts:notifications_read'), {'id': comment.id},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.json(), {'marked': 1, 'unread': 1})
+        response = self.client.post(reverse('posts:notifications_read'))
+        self.assertRedirects(response, reverse('posts:notifications'))
+        self.assertEqual(notifications.get_unread_count(self.author.id), 0)
+        self.comment(self.reader)
+        notifications.flush()
+        self.assertEqual(Notification.objects.filter(read=False).count(), 1)
+        self.assertEqual(notifications.get_unread_count(self.author.id), 1)
@@ -0,0 +1,132 @@
+"""Лента подписок с раздачей постов при записи (fan-out-on-write).
+
+Новый пост копируется в ``TimelineEntry`` каждого подписчика автора,
+поэтому чтение ленты не перебирает всех авторов из подписок. Посты
+авторов, у которых подписчиков больше ``TIMELINE_FANOUT_LIMIT``, не
+раздаются — они подмешиваются в ленту при чтении. Когда автор опускается
+до порога, его профиль помечается, и ``fill_pending`` по расписанию
+раздаёт его последние посты подписчикам: отписка не переписывает чужие
+ленты.
+
+Раздача не обрезает ленты, иначе каждый пост стоил бы обхода лент всех
+подписчиков: длинные ленты обрезает по расписанию ``trim_all``.
+"""
+from django.db.models import Count, Q
+
+from posts.models import Follow, Post, Profile, TimelineEntry
+
+from yatube.settings import TIMELINE_FANOUT_LIMIT, TIMELINE_LENGTH
+
+BATCH_SIZE = 1000
+
+
+def is_fanned_out(author_id):
+    return not Profile.objects.filter(
+        user=author_id, followers_count__gt=TIMELINE_FANOUT_LIMIT).exists()
+
+
+def push(post):
+    if not is_fanned_out(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author=post.author_id).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers.iterator()
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    if is_fanned_out(author_id):
+        fill(user_id, author_id)
+
+
+def fill(user_id, author_id):
+    posts = Post.objects.filter(author=author_id).order_by(
+        '-pub_date').values_list('id', 'pub_date')[:TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim(user_id)
+
+
+def trim(user_id):
+    """Оставляет в ленте только TIMELINE_LENGTH последних записей."""
+    oldest_kept = TimelineEntry.objects.filter(user=user_id).order_by(
+        '-pub_date').values_list('pub_date', flat=True)[
+            TIMELINE_LENGTH - 1:TIMELINE_LENGTH]
+    if oldest_kept:
+        TimelineEntry.objects.filter(
+            user=user_id, pub_date__lt=oldest_kept[0]).delete()
+
+
+def trim_all():
+    """Обрезает все ленты длиннее TIMELINE_LENGTH, возвращает их число."""
+    users = TimelineEntry.objects.order_by().values('user').annotate(
+        entries=Count('id')).filter(
+            entries__gt=TIMELINE_LENGTH).values_list('user', flat=True)
+    trimmed = 0
+    for user_id in users.iterator():
+        trim(user_id)
+        trimmed += 1
+    return trimmed
+
+
+def remove(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user=user_id, post__author=author_id).delete()
+    # Автор опустился до порога: посты, написанные выше порога, никому
+    # не раздавались.
+    Profile.objects.filter(
+        user=author_id, followers_count=TIMELINE_FANOUT_LIMIT,
+    ).update(timeline_pending=True)
+
+
+def fill_pending():
+    """Раздаёт последние посты помеченных авторов всем подписчикам,
+    возвращает число авторов."""
+    Profile.objects.filter(
+        timeline_pending=True, followers_count__gt=TIMELINE_FANOUT_LIMIT,
+    ).update(timeline_pending=False)
+    authors = list(Profile.objects.filter(
+        timeline_pending=True).values_list('user_id', flat=True))
+    for author_id in authors:
+        followers = Follow.objects.filter(
+            author=author_id).values_list('user_id', flat=True)
+        for follower_id in followers.iterator():
+            fill(follower_id, author_id)
+        Profile.objects.filter(user=author_id).update(timeline_pending=False)
+    return len(authors)
+
+
+def get_feed(user):
+    """Посты ленты подписок: материализованные записи плюс посты
+    популярных авторов, которые читаются напрямую."""
+    posts = Q(id__in=TimelineEntry.objects.filter(
+        user=user).values('post_id'))
+    popular = list(
+        Follow.objects.filter(
+            user=user,
+            author__profile__followers_count__gt=TIMELINE_FANOUT_LIMIT,
+        ).values_list('author_id', flat=True)
+    )
+    if popular:
+        posts |= Q(author__in=popular)
+    return Post.objects.for_feed().filter(posts)
+
+
+def rebuild():
+    """Заново раздаёт посты по лентам всех подписок, например после
+    загрузки данных через bulk_create, которая обходит сигналы."""
+    follows = Follow.objects.order_by('pk').values_list('user_id', 'author_id')
+    for user_id, author_id in follows.iterator():
+        backfill(user_id, author_id)
@@ -0,0 +1,173 @@
+"""Потоковый перенос постов, комментариев и подписок.
+
+Записи читаются и пишутся генераторами, а вставляются пачками через
+``bulk_create``, поэтому расход памяти не зависит от размера файла.
+Первичные ключи сохраняются; пользователи и группы должны уже быть в
+базе. Форматы — NDJSON (поле ``model`` в каждой строке, модели можно
+смешивать) и CSV (одна модель на файл). Ошибки в данных поднимают
+``RecordError`` с номером строки; уже вставленные пачки остаются в базе.
+"""
+import csv
+import json
+import time
+from itertools import groupby
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+from posts.models import Comment, Follow, Post
+from posts.utils import batched
+
+MODELS = {
+    'post': Post,
+    'comment': Comment,
+    'follow': Follow,
+}
+FIELDS = {
+    'post': ('id', 'author', 'group', 'text', 'pub_date', 'image'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+    'follow': ('id', 'user', 'author'),
+}
+DATE_FIELDS = ('pub_date', 'created')
+FOREIGN_KEYS = ('author', 'group', 'post', 'user')
+
+
+class RecordError(ValueError):
+    def __init__(self, line, message):
+        super().__init__(f'Строка {line}: {message}')
+        self.line = line
+
+
+def export_records(name, chunk_size=2000):
+    model = MODELS[name]
+    columns = [
+        f'{field}_id' if field in FOREIGN_KEYS else field
+        for field in FIELDS[name]
+    ]
+    rows = model.objects.order_by('pk').values_list(*columns).iterator(
+        chunk_size=chunk_size)
+    for row in rows:
+        record = dict(zip(FIELDS[name], row))
+        for field in DATE_FIELDS:
+            if field in record:
+                record[field] = record[field].isoformat()
+        yield name, record
+
+
+def write_ndjson(stream, records):
+    for name, record in records:
+        stream.write(json.dumps(
+            {'model': name, **record}, ensure_ascii=False) + '\n')
+        yield name
+
+
+def write_csv(stream, name, records):
+    writer = csv.DictWriter(stream, FIELDS[name])
+    writer.writeheader()
+    for record_name, record in records:
+        writer.writerow(record)
+        yield record_name
+
+
+def read_ndjson(stream):
+    """Генерирует ``(номер строки, модель, запись)``."""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            raise RecordError(line_number, f'некорректный JSON: {error}')
+        if not isinstance(record, dict) or record.get('model') not in MODELS:
+            raise RecordError(line_number, 'неизвестная модель')
+        yield line_number, record.pop('model'), record
+
+
+def read_csv(stream, name):
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, name, record
+
+
+def parse_value(field, value):
+    if value == '' and field != 'text':
+        value = None
+    if field == 'image':
+        return value or ''
+    if value is None:
+        return None
+    if field == 'id' or field in FOREIGN_KEYS:
+        return int(value)
+    if field in DATE_FIELDS:
+        date = parse_datetime(value)
+        if date is None:
+            raise ValueError(f'некорректная дата «{value}»')
+        return date
+    return value
+
+
+def build(line_number, name, record):
+    """Экземпляр модели из записи; пустые строки CSV становятся NULL,
+    а пустая дата — текущим временем."""
+    values = {}
+    for field in FIELDS[name]:
+        try:
+            value = parse_value(field, record.get(field))
+        except (TypeError, ValueError) as error:
+            raise RecordError(line_number, f'{field}: {error}')
+        if value is None and field in DATE_FIELDS:
+            continue
+        values[f'{field}_id' if field in FOREIGN_KEYS else field] = value
+    return MODELS[name](**values)
+
+
+def check_references(model, batch):
+    """Ищет ссылки на несуществующие записи до вставки: в транзакции
+    внешние ключи проверяются только при фиксации, без номера строки."""
+    for field in model._meta.concrete_fields:
+        if not field.is_relation:
+            continue
+        ids = {getattr(obj, field.attname) for _, obj in batch}
+        ids.discard(None)
+        found = set(field.related_model.objects.filter(
+            pk__in=ids).values_list('pk', flat=True))
+        for line_number, obj in batch:
+            value = getattr(obj, field.attname)
+            if value is not None and value not in found:
+                raise RecordError(
+                    line_number, f'{field.name} {value} не найден')
+
+
+def import_records(records, batch_size=1000, ignore_conflicts=False):
+    """Вставляет записи пачками, каждая пачка в своей транзакции.
+
+    Генерирует ``(модель, число строк, строк в секунду)`` после каждой
+    пачки, чтобы вызывающий мог показывать прогресс.
+    """
+    started = time.perf_counter()
+    total = 0
+    imported = set()
+    for name, group in groupby(records, key=lambda item: item[1]):
+        model = MODELS[name]
+        imported.add(model)
+        objects = (
+            (line_number, build(line_number, name, record))
+            for line_number, _, record in group
+        )
+        for batch in batched(objects, batch_size):
+            check_references(model, batch)
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    [obj for _, obj in batch],
+                    ignore_conflicts=ignore_conflicts)
+            total += len(batch)
+            yield name, total, total / (time.perf_counter() - started)
+    reset_sequences(imported)
+
+
+def reset_sequences(models):
+    """Сдвигает последовательности ключей после вставки явных id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), list(models))
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -1,14 +1,36 @@
 from django.urls import path
 
-from . import views
+from yatube.settings import ASYNC_FEED_VIEWS
+
+from . import async_views, views
 
 app_name = 'posts'
+feed_views = async_views if ASYNC_FEED_VIEWS else views
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('group/<slug:slug>/', views.group_posts, name='group_list'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('', feed_views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
+    path('group/<slug:slug>/', feed_views.group_posts, name='group_list'),
+    path('profile/<str:username>/', feed_views.profile, name='profile'),
+    path('feed/<str:kind>/', views.feed, name='feed'),
+    path(
+        'group/<slug:slug>/feed/<str:kind>/',
+        views.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feed/<str:kind>/',
+        views.profile_feed,
+        name='profile_feed'
+    ),
+    path('search/', views.search, name='search'),
+    path('posts/<int:post_id>/', feed_views.post_detail,
+         name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/delete/', views.post_delete, name='post_delete'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -18,6 +40,16 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'notifications/',
+        views.notification_list,
+        name='notifications'
+    ),
+    path(
+        'notifications/read/',
+        views.notifications_read,
+        name='notifications_read'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
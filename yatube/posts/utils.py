@@ -1,11 +1,210 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
+from collections.abc import Sequence
 
-from yatube.settings import POSTS_PER_PAGE
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from yatube.settings import NUMBERED_PAGES_MAX, POSTS_PER_PAGE
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
 
 
 def get_all_fields(klass):
     return tuple(field.name for field in klass._meta.fields)
 
 
+def batched(iterable, size):
+    """Списки по size элементов из iterable, последний может быть короче."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class CursorPage(Sequence):
+    """Страница ленты без общего числа объектов.
+
+    Номер известен только у неглубоких страниц, открытых по ``?page=``,
+    дальше навигация идёт по курсорам.
+    """
+
+    def __init__(self, object_list, number=None, next_cursor=None,
+                 previous_cursor=None, has_previous=False):
+        self.object_list = object_list
+        self.number = number
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._has_previous = has_previous
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f'<CursorPage {self.number or self.previous_cursor}>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_query(self):
+        if self.number and self.number < NUMBERED_PAGES_MAX:
+            return f'page={self.number + 1}'
+        return f'cursor={self.next_cursor}'
+
+    @property
+    def previous_query(self):
+        if self.number:
+            return f'page={self.number - 1}'
+        return f'cursor={self.previous_cursor}'
+
+
+class CursorPaginator:
+    """Keyset-пагинация: ищет позицию по значениям полей сортировки
+    вместо ``COUNT(*)`` и ``OFFSET``."""
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id')):
+        self.object_list = object_list.order_by(*ordering)
+        self.per_page = per_page
+        self.ordering = ordering
+
+    def encode_cursor(self, obj, reverse=False):
+        return self.encode_values(
+            [getattr(obj, field.lstrip('-')) for field in self.ordering],
+            reverse,
+        )
+
+    def encode_values(self, values, reverse=False):
+        data = json.dumps(
+            {'v': values, 'r': reverse},
+            default=str,
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            data = json.loads(
+                base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            )
+            values, reverse = data['v'], bool(data['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        opts = self.object_list.model._meta
+        cleaned = []
+        for field, value in zip(self.ordering, values):
+            model_field = opts.get_field(field.lstrip('-'))
+            try:
+                value = model_field.to_python(value)
+            except (ValidationError, TypeError, OverflowError):
+                return None
+            if value is None and not model_field.null:
+                return None
+            if isinstance(value, int) and not INT64_MIN <= value <= INT64_MAX:
+                return None
+            cleaned.append(value)
+        return cleaned, reverse
+
+    def position(self, cursor=None, number=None):
+        """Позиция страницы для ключа кеша: курсор, заново собранный из
+        проверенных значений, или номер страницы в допустимых пределах."""
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            return f'page={self.clean_number(number)}'
+        return f'cursor={self.encode_values(*decoded)}'
+
+    def seek(self, values, reverse=False):
+        """Условие «строго после (или до) позиции values» в порядке
+        сортировки: (a < x) OR (a = x AND b < y) OR ..."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            condition |= Q(**equal, **{lookup: value})
+            equal[name] = value
+        return self.object_list.filter(condition)
+
+    def get_page(self, cursor=None, number=None):
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            return self.get_numbered_page(number)
+        values, reverse = decoded
+        if not reverse:
+            objects = list(self.seek(values)[:self.per_page + 1])
+            return self.make_page(
+                objects[:self.per_page],
+                has_next=len(objects) > self.per_page,
+                has_previous=True,
+            )
+        reversed_ordering = [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        ]
+        objects = list(
+            self.seek(values, reverse=True).order_by(
+                *reversed_ordering)[:self.per_page + 1]
+        )
+        return self.make_page(
+            objects[:self.per_page][::-1],
+            has_next=True,
+            has_previous=len(objects) > self.per_page,
+        )
+
+    @staticmethod
+    def clean_number(number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        return min(max(number, 1), NUMBERED_PAGES_MAX)
+
+    def get_numbered_page(self, number):
+        number = self.clean_number(number)
+        offset = (number - 1) * self.per_page
+        objects = list(self.object_list[offset:offset + self.per_page + 1])
+        return self.make_page(
+            objects[:self.per_page],
+            number=number,
+            has_next=len(objects) > self.per_page,
+            has_previous=number > 1,
+        )
+
+    def make_page(self, objects, number=None, has_next=False,
+                  has_previous=False):
+        next_cursor = previous_cursor = None
+        if objects and has_next:
+            next_cursor = self.encode_cursor(objects[-1])
+        if objects and has_previous:
+            previous_cursor = self.encode_cursor(objects[0], reverse=True)
+        return CursorPage(
+            objects,
+            number=number,
+            next_cursor=next_cursor,
+            previous_cursor=previous_cursor,
+            has_previous=has_previous,
+        )
+
+
 def get_page_obj(request, posts):
-    return Paginator(posts, POSTS_PER_PAGE).get_page(request.GET.get('page'))
+    return CursorPaginator(posts, POSTS_PER_PAGE).get_page(
+        cursor=request.GET.get('cursor'),
+        number=request.GET.get('page'),
+    )
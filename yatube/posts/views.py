@@ -1,45 +1,57 @@
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
+from posts import cache, notifications
+from posts.cache import (get_comments_page, get_follow_page, get_group_page,
+                         get_index_page, get_post_data, get_profile_page,
+                         get_trending)
+from posts.feeds import feed_response
 from posts.forms import CommentForm, GroupForm, PostForm, ProfileForm
-from posts.models import Comment, Follow, Group, Post, Profile, User
-from posts.utils import get_page_obj
+from posts.models import Follow, Group, Notification, Post, Profile, User
+from posts.search import search as search_posts
 
-from yatube.settings import CACHE_TIMEOUT, CHARS_SHOWN
+from yatube.settings import CHARS_SHOWN, NOTIFICATIONS_SHOWN, POSTS_PER_PAGE
 
 
-@cache_page(timeout=CACHE_TIMEOUT, key_prefix='index_page')
 def index(request):
-    posts = Post.objects.all()
     context = {
         'page_name': 'index',
-        'page_obj': get_page_obj(request, posts),
+        'page_obj': get_index_page(request),
     }
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    trending = get_trending()
+    context = {
+        'page_name': 'trending',
+        'page_obj': trending['posts'],
+        'groups': trending['groups'],
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
     context = {
         'group': group,
-        'page_obj': get_page_obj(request, posts),
+        'page_obj': get_group_page(request, group),
     }
     return render(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author)
-    followers_num = Follow.objects.filter(author=author).count()
-    following_num = Follow.objects.filter(user=author).count()
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username)
     context = {
         'author': author,
-        'posts_num': posts.count(),
-        'page_obj': get_page_obj(request, posts),
-        'followers_num': followers_num,
-        'following_num': following_num
+        'posts_num': author.profile.posts_count,
+        'page_obj': get_profile_page(request, author),
+        'followers_num': author.profile.followers_count,
+        'following_num': author.profile.following_count,
     }
     if request.user.is_authenticated:
         context['following'] = Follow.objects.filter(
@@ -47,22 +59,75 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def feed(request, kind):
+    return feed_response(
+        request, kind, 'index', (cache.SITE, cache.INDEX),
+        Post.objects.for_feed(), 'Yatube', reverse('posts:index'),
+        'Последние обновления на сайте',
+    )
+
+
+def group_feed(request, slug, kind):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request, kind, f'group:{group.id}',
+        (cache.SITE, cache.group_scope(group.id)),
+        group.posts.for_feed(), group.title,
+        reverse('posts:group_list', kwargs={'slug': slug}),
+        group.description,
+    )
+
+
+def profile_feed(request, username, kind):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request, kind, f'author:{author.id}',
+        (cache.SITE, cache.author_scope(author.id)),
+        Post.objects.filter(author=author).for_feed(), f'@{username}',
+        reverse('posts:profile', kwargs={'username': username}),
+        f'Посты пользователя @{username}',
+    )
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    context = {
+        'query': query,
+        'page_obj': search_posts(
+            query, request.GET.get('cursor'), POSTS_PER_PAGE),
+    }
+    return render(request, 'posts/search.html', context)
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    num_posts = Post.objects.filter(author=post.author).count()
-    form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post_id)
+    data = get_post_data(post_id)
+    if not data:
+        raise Http404
+    post = data['post']
     context = {
         'post': post,
-        'form': form,
-        'comments': comments,
-        'num_posts': num_posts,
-        'num_comments': comments.count(),
+        'form': CommentForm(request.POST or None),
+        'comments': get_comments_page(
+            post_id, request.GET.get('comments')),
+        'num_comments': post.comments_count,
         'CHARS_SHOWN': CHARS_SHOWN,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Следующая порция комментариев для подгрузки при прокрутке."""
+    comments = get_comments_page(post_id, request.GET.get('cursor'))
+    return JsonResponse({
+        'html': render_to_string(
+            'posts/includes/comments.html',
+            {'comments': comments},
+            request=request,
+        ),
+        'next': comments.next_cursor,
+    })
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -123,16 +188,42 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    following = Follow.objects.filter(user=request.user).values_list(
-        'author', flat=True)
-    posts = Post.objects.filter(author__in=following)
     context = {
         'page_name': 'follow_index',
-        'page_obj': get_page_obj(request, posts)
+        'page_obj': get_follow_page(request, request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def notification_list(request):
+    notifications.flush()
+    context = {
+        'notifications': Notification.objects.filter(
+            recipient=request.user
+        ).select_related('post', 'last_actor').order_by(
+            'read', '-updated')[:NOTIFICATIONS_SHOWN],
+    }
+    return render(request, 'posts/notifications.html', context)
+
+
+@login_required
+@require_POST
+def notifications_read(request):
+    """Отмечает прочитанными переданные id или, без них, все уведомления."""
+    ids = request.POST.getlist('id')
+    marked = notifications.mark_read(
+        request.user.id,
+        [int(pk) for pk in ids if pk.isdigit()] if ids else None
+    )
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'marked': marked,
+            'unread': notifications.get_unread_count(request.user.id),
+        })
+    return redirect('posts:notifications')
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
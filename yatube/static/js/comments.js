@@ -0,0 +1,41 @@
+(function () {
+  var more = document.getElementById('more-comments');
+  var list = document.getElementById('comment-list');
+  if (!more || !list || !window.fetch) {
+    return;
+  }
+  var loading = false;
+
+  function load() {
+    if (loading || !more.dataset.cursor) {
+      return;
+    }
+    loading = true;
+    fetch(more.dataset.url + '?cursor=' + encodeURIComponent(more.dataset.cursor), {
+      headers: {'X-Requested-With': 'XMLHttpRequest'}
+    })
+      .then(function (response) { return response.json(); })
+      .then(function (data) {
+        list.insertAdjacentHTML('beforeend', data.html);
+        if (data.next) {
+          more.dataset.cursor = data.next;
+          more.href = '?comments=' + data.next + '#comments';
+        } else {
+          more.remove();
+        }
+      })
+      .finally(function () { loading = false; });
+  }
+
+  more.addEventListener('click', function (event) {
+    event.preventDefault();
+    load();
+  });
+  if ('IntersectionObserver' in window) {
+    new IntersectionObserver(function (entries) {
+      if (entries[0].isIntersecting) {
+        load();
+      }
+    }, {rootMargin: '200px'}).observe(more);
+  }
+})();
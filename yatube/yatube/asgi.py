@@ -0,0 +1,13 @@
+import os
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = get_asgi_application()
+
+if settings.CACHED_TEMPLATES:
+    from core.warmup import warm_templates
+
+    warm_templates()
@@ -0,0 +1,7 @@
+from .base import *  # noqa: F401, F403
+from .base import ENVIRONMENT
+
+if ENVIRONMENT == 'prod':
+    from .prod import *  # noqa: F401, F403
+else:
+    from .dev import *  # noqa: F401, F403
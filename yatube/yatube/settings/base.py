@@ -0,0 +1,225 @@
+import os
+from datetime import timedelta
+
+from dotenv import load_dotenv
+
+CACHE_TIMEOUT = 60 * 60 * 6
+CHARS_SHOWN = 30
+POSTS_PER_PAGE = 10
+NUMBERED_PAGES_MAX = 5
+ADMIN_EXACT_COUNT_LIMIT = 10000
+COMMENTS_PER_PAGE = 20
+FEED_LENGTH = 50
+TRENDING_LENGTH = 20
+TRENDING_GROUPS = 10
+TRENDING_HALF_LIFE = timedelta(hours=12)
+TRENDING_MIN_SCORE = 0.01
+NOTIFICATIONS_SHOWN = 50
+NOTIFICATION_BUFFER_SIZE = 100
+NOTIFICATION_FLUSH_INTERVAL = 5
+TIMELINE_LENGTH = 1000
+TIMELINE_FANOUT_LIMIT = 1000
+IMAGE_WORKERS = 2
+POST_IMAGE_WIDTHS = (320, 640, 960, 1280)
+PROFILE_PHOTO_WIDTHS = (64, 128, 256)
+
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv(dotenv_path=os.path.join(BASE_DIR, '.env'))
+
+ENVIRONMENT = os.getenv('DJANGO_ENV', 'dev')
+
+# Асинхронные страницы лент (posts/async_views.py) для запуска под ASGI.
+ASYNC_FEED_VIEWS = os.getenv('ASYNC_FEED_VIEWS', 'False') == 'True'
+ASYNC_PARALLEL_QUERIES = os.getenv(
+    'ASYNC_PARALLEL_QUERIES', 'True') == 'True'
+
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 1))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+# Токен для сборщика метрик: Authorization: Bearer <METRICS_TOKEN>.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.getenv(
+    'STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
+STATIC_MAX_AGE = 60 * 60
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# Отдавать статику и медиа из Django (core.views), если перед ним нет
+# nginx. С MEDIA_ACCEL_REDIRECT, например /protected-media/, медиа
+# отдаёт nginx по этому internal-адресу.
+SERVE_FILES = os.getenv('SERVE_FILES', 'False') == 'True'
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', '')
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+SECRET_KEY = os.getenv('SECRET_KEY')
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+    'www.halcyneon.pythonanywhere.com',
+    'halcyneon.pythonanywhere.com',
+]
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'about.apps.AboutConfig',
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
+]
+
+MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware'
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Скомпилированные шаблоны хранятся в памяти процесса; wsgi.py и asgi.py
+# компилируют их все при старте (core.warmup).
+CACHED_TEMPLATES = os.getenv(
+    'CACHED_TEMPLATES', str(ENVIRONMENT == 'prod')) == 'True'
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'OPTIONS': {
+            'loaders': (
+                [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+                if CACHED_TEMPLATES else TEMPLATE_LOADERS
+            ),
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'posts.context_processors.notifications',
+            ],
+        },
+    },
+]
+
+# Пользователь сессии читается из кеша (core.auth), сами сессии — из
+# кеша с записью в базу. signed_cookies не трогает ни базу, ни кеш, но
+# такую сессию нельзя завершить на сервере.
+AUTHENTICATION_BACKENDS = ['core.auth.CachedModelBackend']
+SESSION_BACKENDS = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_BACKENDS[os.getenv('SESSION_BACKEND', 'cached_db')]
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
+
+
+# База выбирается переменными окружения DB_*. Соединения живут
+# DB_CONN_MAX_AGE секунд и перед повторным использованием проверяются
+# (core.db.HealthCheckMixin). SQLite настраивается PRAGMA при открытии
+# соединения: WAL, чтобы читатели не ждали писателей.
+DATABASE_ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'core.backends.postgresql',
+}
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+DATABASES = {
+    'default': {
+        'ENGINE': DATABASE_ENGINES[DB_ENGINE],
+        'NAME': os.getenv('DB_NAME', (
+            os.path.join(BASE_DIR, 'db.sqlite3')
+            if DB_ENGINE == 'sqlite' else 'yatube'
+        )),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+    }
+}
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.'
+        'UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.'
+        'MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.'
+        'CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.'
+        'NumericPasswordValidator',
+    },
+]
+
+
+LANGUAGE_CODE = 'en'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Письма копятся в core.OutboxMessage, а отправляет их воркер
+# «manage.py send_outbox --loop». Для разработки подойдёт
+# «manage.py smtp_stub» на порту по умолчанию.
+EMAIL_BACKEND = 'core.mail.OutboxBackend'
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 1025))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+EMAIL_TIMEOUT = 10
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = timedelta(minutes=1)
+OUTBOX_LEASE = timedelta(minutes=5)
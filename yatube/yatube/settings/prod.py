@@ -0,0 +1,44 @@
+import os
+
+from .base import *  # noqa: F401, F403
+from .base import BASE_DIR
+
+DEBUG = os.getenv('DEBUG', 'False') == 'True'
+
+if os.getenv('ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS').split(',')
+
+# Общий для всех воркеров кеш: file или redis (нужен пакет django-redis).
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django_redis.cache.RedisCache',
+}
+SHARED_CACHE = {
+    'BACKEND': CACHE_BACKENDS[os.getenv('CACHE_BACKEND', 'file')],
+    'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+}
+
+# Локальный кеш процесса перед общим. Версии ключей (posts.cache), сессии
+# и пользователи сессий всегда читаются из общего кеша, поэтому
+# инвалидация и выход из аккаунта видны всем воркерам сразу.
+LOCAL_CACHE_TIMEOUT = int(os.getenv('LOCAL_CACHE_TIMEOUT', 60))
+
+if LOCAL_CACHE_TIMEOUT:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TwoLevelCache',
+            'OPTIONS': {
+                'SHARED': 'shared',
+                'LOCAL_TIMEOUT': LOCAL_CACHE_TIMEOUT,
+                'LOCAL_EXCLUDE_PREFIXES': (
+                    'version:', 'auth:', 'django.contrib.sessions.'),
+            },
+        },
+        'shared': SHARED_CACHE,
+    }
+else:
+    CACHES = {'default': SHARED_CACHE}
+
+# Имена с хешем и сжатые копии собираются «manage.py collectstatic».
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
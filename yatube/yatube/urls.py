@@ -1,7 +1,8 @@
+from core.views import media_file, metrics, static_file
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
@@ -10,12 +11,27 @@ handler403 = 'core.views.permission_denied'
 urlpatterns = [
     path('about/', include('about.urls', namespace='about')),
     path('admin/', admin.site.urls),
+    path('api/', include('api.urls', namespace='api')),
+    path('metrics', metrics, name='metrics'),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('posts.urls', namespace='posts'))
 ]
 
-if settings.DEBUG:
+if settings.SERVE_FILES:
+    urlpatterns = [
+        re_path(
+            rf'^{settings.STATIC_URL.lstrip("/")}(?P<path>.+)$',
+            static_file,
+            name='static'
+        ),
+        re_path(
+            rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$',
+            media_file,
+            name='media'
+        ),
+    ] + urlpatterns
+elif settings.DEBUG:
 
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT